@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pacchetto degli assets in un singolo file, già decodificato.
+
+Decodificare PNG e WAV all'avvio leggendo tanti file sparsi è lento sui
+dispositivi con storage lento (es. SD card). Il packer legge una volta
+tutti gli assets e li salva in un unico file:
+
+  * immagini: pixel grezzi in formato BGRA, lo stesso di una surface
+    restituita da `convert_alpha()` su un display a 32 bit;
+  * suoni: campioni PCM già decodificati, nel formato del mixer;
+  * font e musica: byte del file originale.
+
+Struttura del file:
+
+  MAGIC (4 byte) | versione (u32) | lunghezza indice (u32) | indice JSON | dati
+
+Ogni blocco di dati è allineato a `ALIGNMENT` byte. A runtime il file viene
+mappato in memoria con `mmap` e le surface vengono create direttamente sopra
+la mappa con `pg.image.frombuffer`, senza copie.
+
+Per creare il pacchetto:
+
+    python assetpack.py [percorso_output]
+"""
+
+import io
+import json
+import mmap
+import os
+import pathlib
+import struct
+import sys
+
+import pygame as pg
+
+from settings import *
+
+MAGIC = b"PGPK"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+ALIGNMENT = 64
+
+IMAGE_FORMAT = "BGRA"
+
+IMAGE_EXTENSIONS = {".png"}
+SOUND_EXTENSIONS = {".wav"}
+RAW_EXTENSIONS = {".ttf", ".ogg"}
+
+
+class AssetPackError(Exception):
+    pass
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _collect_assets(root) -> dict[str, tuple[dict, bytes]]:
+    """
+    Decodifica tutti gli assets presenti in `root`.
+    Restituisce un dizionario { nome : (metadati, dati) }, dove il
+    nome è il percorso relativo a `root`.
+    """
+    assets = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            path = pathlib.Path(dirpath) / filename
+            name = path.relative_to(root).as_posix()
+            ext = path.suffix.lower()
+
+            if ext in IMAGE_EXTENSIONS:
+                surface = pg.image.load(path)
+                meta = {"kind": "image", "size": surface.get_size(), "format": IMAGE_FORMAT}
+                data = pg.image.tostring(surface, IMAGE_FORMAT)
+            elif ext in SOUND_EXTENSIONS:
+                meta = {"kind": "sound", "mixer": pg.mixer.get_init()}
+                data = pg.mixer.Sound(path).get_raw()
+            elif ext in RAW_EXTENSIONS:
+                meta = {"kind": "raw"}
+                data = path.read_bytes()
+            else:
+                continue
+
+            # Con questi dati `AssetPack.is_current` riconosce i sorgenti modificati dopo la creazione del pacchetto.
+            stat = path.stat()
+            meta["source"] = [stat.st_mtime_ns, stat.st_size]
+            assets[name] = meta, data
+    return assets
+
+
+def build_pack(output, root=ASSETS):
+    """
+    Crea il pacchetto `output` con tutti gli assets contenuti in `root`.
+    Il mixer deve essere già inizializzato: i suoni vengono decodificati
+    nel suo formato, e il gioco riaprirà il mixer con gli stessi parametri
+    (vedi `assets.configure_mixer`).
+    """
+    assets = _collect_assets(root)
+
+    # L'indice contiene gli offset assoluti dei dati, che dipendono a loro
+    # volta dalla lunghezza dell'indice: lo calcolo finché non si stabilizza.
+    index_size = 0
+    while True:
+        offset = _align(HEADER.size + index_size)
+        index = {}
+        for name, (meta, data) in assets.items():
+            index[name] = dict(meta, offset=offset, length=len(data))
+            offset = _align(offset + len(data))
+
+        index_bytes = json.dumps(index, sort_keys=True).encode()
+        if len(index_bytes) == index_size:
+            break
+        index_size = len(index_bytes)
+
+    with open(output, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for name, (_, data) in assets.items():
+            f.seek(index[name]["offset"])
+            f.write(data)
+
+
+class _ViewReader(io.RawIOBase):
+    """
+    File in sola lettura sopra un `memoryview`.
+    """
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class AssetPack:
+    """
+    Lettore del pacchetto di assets.
+
+    Il file viene mappato in memoria in copy-on-write: le pagine vengono lette
+    dal disco solo quando servono e condivise con la page cache, mentre
+    un'eventuale scrittura su una surface non modifica il file.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if hasattr(mmap, "MADV_RANDOM"):
+            # Prima di leggere l'header: altrimenti il primo page fault
+            # porta nella page cache l'intero pacchetto (vedi `_advise`).
+            self._mmap.madvise(mmap.MADV_RANDOM)
+        self._view = memoryview(self._mmap)
+
+        magic, version, index_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise AssetPackError(f"Invalid asset pack: {filename}")
+
+        start = HEADER.size
+        self.index: dict[str, dict] = json.loads(self._view[start:start + index_size].tobytes())
+        self._advise()
+
+    def _advise(self):
+        """
+        Immagini e suoni vengono caricati tutti all'avvio: si chiede al kernel
+        di leggerli in blocco. Per il resto niente readahead, così la musica
+        (~1 MB) viene letta in streaming mentre suona e non finisce tutta
+        nella page cache all'avvio.
+        """
+        if not hasattr(mmap, "MADV_RANDOM"):
+            return
+
+        for entry in self.index.values():
+            if entry["kind"] != "raw":
+                start = entry["offset"] - entry["offset"] % mmap.PAGESIZE
+                self._mmap.madvise(mmap.MADV_WILLNEED, start, entry["offset"] + entry["length"] - start)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    @property
+    def mixer(self) -> tuple[int, int, int] | None:
+        """
+        Parametri del mixer (frequenza, formato, canali) con cui sono
+        stati decodificati i suoni, oppure `None` se non ci sono suoni.
+        """
+        for entry in self.index.values():
+            if entry["kind"] == "sound":
+                return tuple(entry["mixer"])
+        return None
+
+    def is_current(self, name: str, source) -> bool:
+        """
+        `True` se l'asset `name` è nel pacchetto ed è aggiornato rispetto
+        al file sorgente `source`. Se il sorgente non esiste (es. quando
+        si distribuisce solo il pacchetto), vale la versione nel pacchetto.
+        """
+        entry = self.index.get(name)
+        if entry is None:
+            return False
+
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return True
+        return entry.get("source") == [stat.st_mtime_ns, stat.st_size]
+
+    def _entry(self, name: str, kind: str) -> tuple[dict, memoryview]:
+        try:
+            entry = self.index[name]
+        except KeyError:
+            raise AssetPackError(f"Asset not found: {name}") from None
+
+        if entry["kind"] != kind:
+            raise AssetPackError(f"Asset {name} is not of kind {kind}")
+
+        offset = entry["offset"]
+        return entry, self._view[offset:offset + entry["length"]]
+
+    def image(self, name: str) -> pg.Surface:
+        """
+        Restituisce una surface che condivide i pixel con il pacchetto.
+        """
+        entry, data = self._entry(name, "image")
+        return pg.image.frombuffer(data, entry["size"], entry["format"])
+
+    def sound(self, name: str) -> pg.mixer.Sound:
+        """
+        Restituisce il suono già decodificato.
+
+        NOTA: SDL_mixer tiene i campioni in un proprio buffer, per cui
+              la copia dei dati PCM in questo caso non è evitabile.
+        """
+        entry, data = self._entry(name, "sound")
+        if tuple(entry["mixer"]) != pg.mixer.get_init():
+            raise AssetPackError(f"Mixer settings differ from the packed ones: {entry['mixer']}")
+        return pg.mixer.Sound(buffer=data)
+
+    def file(self, name: str) -> io.BufferedReader:
+        """
+        Restituisce un file in sola lettura con i byte originali dell'asset,
+        da passare ad esempio a `pg.font.Font` o `pg.mixer.music.load`.
+        Legge direttamente dalla mappa del pacchetto: a differenza di
+        `io.BytesIO` non copia l'asset (la musica è ~1 MB) in memoria privata.
+        """
+        _, data = self._entry(name, "raw")
+        return io.BufferedReader(_ViewReader(data))
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pg.mixer.init()
+    out = sys.argv[1] if len(sys.argv) > 1 else ASSET_PACK
+    build_pack(out)
+    print(f"Asset pack written to {out}")
@@ -1,12 +1,159 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import pathlib
 import sys
+import weakref
 
 import pygame as pg
 
 from settings import *
 
+from assetpack import AssetPack, AssetPackError
+
+_pack: AssetPack | None = None
+
+
+def _get_pack() -> AssetPack | None:
+    """
+    Restituisce il pacchetto di assets, aprendolo al primo utilizzo.
+    `None` se il pacchetto non esiste (es. in sviluppo).
+    """
+    global _pack
+    if _pack is None and ASSET_PACK.exists():
+        _pack = AssetPack(ASSET_PACK)
+    return _pack
+
+
+def configure_mixer():
+    """
+    Da chiamare prima di `pg.init()`. Se esiste il pacchetto, fa aprire il
+    mixer con gli stessi parametri con cui sono stati decodificati i suoni,
+    vietando a SDL di cambiarli per adattarsi al dispositivo: in quel caso
+    è SDL a convertire i campioni in uscita.
+    """
+    pack = _get_pack()
+    if pack is None or pack.mixer is None:
+        return
+
+    frequency, size, channels = pack.mixer
+    pg.mixer.pre_init(frequency, size, channels, allowedchanges=0)
+
+
+def _pack_name(filename) -> str | None:
+    """
+    Restituisce il nome dell'asset nel pacchetto, oppure `None` se non è
+    presente, se il file non è tra gli assets o se è stato modificato dopo
+    la creazione del pacchetto: in questi casi si carica il file sciolto.
+    """
+    pack = _get_pack()
+    if pack is None:
+        return None
+
+    path = pathlib.Path(filename).resolve()
+    if not path.is_relative_to(ASSETS):
+        return None
+
+    name = path.relative_to(ASSETS).as_posix()
+    return name if pack.is_current(name, path) else None
+
+
+def load_image(filename) -> pg.Surface:
+    """
+    Carica un'immagine, già nel formato del display.
+    """
+    name = _pack_name(filename)
+    if name is not None:
+        return _pack.image(name)
+    return pg.image.load(filename).convert_alpha()
+
+
+def load_sound(filename) -> pg.mixer.Sound:
+    """
+    Carica un suono.
+    """
+    name = _pack_name(filename)
+    if name is not None:
+        try:
+            return _pack.sound(name)
+        except AssetPackError:
+            # Il mixer non è stato aperto con `configure_mixer`: i campioni non
+            # sono utilizzabili così come sono. Senza il file sciolto (es. quando
+            # si distribuisce solo il pacchetto) non c'è alternativa.
+            if not pathlib.Path(filename).exists():
+                raise
+    return pg.mixer.Sound(filename)
+
+
+def load_font(filename, size: int) -> pg.font.Font:
+    """
+    Carica un font alla dimensione `size`.
+    """
+    name = _pack_name(filename)
+    if name is not None:
+        return pg.font.Font(_pack.file(name), size)
+    return pg.font.Font(filename, size)
+
+
+def load_music(filename):
+    """
+    Carica la musica di sottofondo in `pg.mixer.music`.
+    """
+    name = _pack_name(filename)
+    if name is not None:
+        return pg.mixer.music.load(_pack.file(name))
+    return pg.mixer.music.load(filename)
+
+
+# Maschere di collisione, calcolate una sola volta per ogni surface.
+_masks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_mask(surface: pg.Surface) -> pg.mask.Mask:
+    """
+    Restituisce la maschera dei pixel non trasparenti di `surface`.
+    La maschera viene calcolata solo la prima volta e resta in cache
+    finché esiste la surface.
+    """
+    mask = _masks.get(surface)
+    if mask is None:
+        mask = _masks[surface] = pg.mask.from_surface(surface)
+    return mask
+
+
+COLORKEY = (255, 0, 255)
+
+
+def optimize_surface(surface: pg.Surface) -> pg.Surface:
+    """
+    Restituisce `surface` nel formato del display che ne rende il `blit`
+    più veloce:
+
+      * senza trasparenza: `convert()`, nessuna fusione dei colori;
+      * pixel solo del tutto trasparenti od opachi: `convert()` con
+        colorkey e `RLEACCEL`, che salta i pixel trasparenti a blocchi;
+      * trasparenza parziale: `convert_alpha()`.
+    """
+    if not surface.get_flags() & pg.SRCALPHA:
+        return surface.convert()
+
+    size = surface.get_width() * surface.get_height()
+    opaque = pg.mask.from_surface(surface, 254).count()
+    if opaque == size:
+        return surface.convert()
+
+    visible = pg.mask.from_surface(surface, 0).count()
+    if opaque == visible:
+        image = pg.Surface(surface.get_size())
+        image.fill(COLORKEY)
+        image.blit(surface, (0, 0))
+        if pg.mask.from_threshold(image, COLORKEY, (1, 1, 1, 255)).count() == size - visible:
+            image = image.convert()
+            image.set_colorkey(COLORKEY, pg.RLEACCEL)
+            return image
+
+    return surface.convert_alpha()
+
 
 class Tileset:
     """
@@ -15,7 +162,7 @@ class Tileset:
     """
 
     def __init__(self, filename: str, tilesize: int):
-        self.sheet = pg.image.load(filename).convert_alpha()
+        self.sheet = load_image(filename)
         self.tilesize = tilesize
 
         size_x, size_y = self.sheet.get_size()
@@ -31,8 +178,7 @@ class Tileset:
         image = pg.Surface(size, pg.SRCALPHA)
         pos = (x * self.tilesize, y * self.tilesize)
         image.blit(self.sheet, (0, 0), pg.Rect(pos, size))
-        image.convert_alpha()
-        return image
+        return optimize_surface(image)
 
     def images_at_row(self, y: int) -> list[pg.Surface]:
         """
@@ -47,6 +193,59 @@ class Tileset:
         return [self.image_at(x, y) for y in range(self.rows)]
 
 
+class TextCache:
+    """
+    Cache delle scritte renderizzate con `pg.font.Font.render`.
+
+    Renderizzare del testo è un'operazione costosa, per cui ogni
+    `Surface` prodotta viene memorizzata con chiave
+    (font, dimensione, testo, colore) e riutilizzata finché non viene
+    scartata perché meno usata di recente (LRU).
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._fonts: dict[tuple[str, int], pg.font.Font] = {}
+        self._surfaces: dict[tuple[str, int, str, tuple], pg.Surface] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, filename, size: int) -> pg.font.Font:
+        """
+        Restituisce il font `filename` alla dimensione `size`,
+        caricandolo solo la prima volta.
+        """
+        key = (str(filename), size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = load_font(filename, size)
+        return font
+
+    def render(self, filename, size: int, text: str, color) -> pg.Surface:
+        """
+        Restituisce la `Surface` con `text` scritto col font `filename`
+        alla dimensione `size` e di colore `color`.
+        """
+        key = (str(filename), size, text, tuple(pg.Color(color)))
+        surface = self._surfaces.pop(key, None)
+        if surface is None:
+            self.misses += 1
+            surface = self.font(filename, size).render(text, False, color)
+            if len(self._surfaces) >= self.max_size:
+                # I dizionari mantengono l'ordine di inserimento: il primo
+                # elemento è quello usato meno di recente.
+                del self._surfaces[next(iter(self._surfaces))]
+        else:
+            self.hits += 1
+
+        # Reinserisco la chiave in coda, segnandola come la più recente.
+        self._surfaces[key] = surface
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
 if __name__ == "__main__":
     pg.init()
     pg.display.set_caption("Prova assets.py")
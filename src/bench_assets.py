@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del caricamento degli assets: file sciolti contro `assets.pack`.
+
+Ogni misura gira in un processo nuovo, che inizializza pygame e carica tutti
+gli assets con i loader di `assets`, come all'avvio del gioco. Per ogni
+modalità riporta:
+
+  * il tempo di caricamento, a page cache calda e fredda (prima delle misure
+    a freddo i file vengono tolti dalla page cache con `posix_fadvise`);
+  * i byte letti dallo storage (`/proc/self/io`);
+  * la memoria anonima (`RssAnon`) e quella mappata da file (`RssFile`)
+    aggiunte dal caricamento: con il pacchetto i pixel restano nelle pagine
+    della page cache, condivise tra processi, invece che in copie private.
+
+Il pacchetto va creato prima con `script/pack`.
+
+    python bench_assets.py
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from settings import *
+
+REPEAT = 21
+
+
+def _proc_fields(path: str) -> dict[str, int]:
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            value = value.split()
+            if value and value[0].isdigit():
+                fields[key] = int(value[0])
+    return fields
+
+
+def load_all(mode: str) -> dict:
+    """
+    Carica tutti gli assets dai file sciolti (`mode == "loose"`)
+    oppure dal pacchetto, e restituisce le misure.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    import pygame as pg
+
+    import assets
+
+    status = _proc_fields("/proc/self/status")
+    io = _proc_fields("/proc/self/io")
+    start = time.perf_counter()
+
+    if mode == "loose":
+        assets._get_pack = lambda: None
+    else:
+        assets.configure_mixer()
+    init_start = time.perf_counter()
+    pg.init()
+    pg.display.set_mode((1, 1))
+    init = time.perf_counter() - init_start
+
+    loaded = []
+    for dirpath, _, filenames in os.walk(ASSETS):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            ext = os.path.splitext(filename)[1].lower()
+            if ext == ".png":
+                loaded.append(assets.load_image(path))
+            elif ext == ".wav":
+                loaded.append(assets.load_sound(path))
+            elif ext == ".ttf":
+                loaded.append(assets.load_font(path, 8))
+            elif ext == ".ogg":
+                assets.load_music(path)
+
+    elapsed = time.perf_counter() - start
+    status_end = _proc_fields("/proc/self/status")
+    io_end = _proc_fields("/proc/self/io")
+    return {
+        "ms": elapsed * 1000,
+        "load_ms": (elapsed - init) * 1000,
+        "read_kb": (io_end["read_bytes"] - io["read_bytes"]) // 1024,
+        "anon_kb": status_end["RssAnon"] - status["RssAnon"],
+        "file_kb": status_end["RssFile"] - status["RssFile"],
+    }
+
+
+def drop_page_cache(mode: str):
+    """
+    Toglie dalla page cache i file letti da `mode`.
+    """
+    if mode == "loose":
+        paths = [os.path.join(d, f) for d, _, files in os.walk(ASSETS) for f in files]
+    else:
+        paths = [ASSET_PACK]
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def measure(mode: str, cold: bool) -> dict:
+    runs = []
+    for _ in range(REPEAT):
+        if cold:
+            drop_page_cache(mode)
+        child = subprocess.run([sys.executable, __file__, "--child", mode],
+                               capture_output=True, text=True, check=True)
+        runs.append(json.loads(child.stdout.splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(load_all(sys.argv[2])))
+        sys.exit()
+
+    if not ASSET_PACK.exists():
+        sys.exit(f"{ASSET_PACK} not found: run script/pack first")
+
+    print(f"Median of {REPEAT} fresh processes")
+    print("(load ms: total ms without pg.init)")
+    print(f"{'mode':>6} {'cache':>6} {'ms':>7} {'load ms':>8} {'read KiB':>9} {'anon KiB':>9} {'file KiB':>9}")
+    for mode in ("loose", "pack"):
+        for cold in (False, True):
+            r = measure(mode, cold)
+            print(f"{mode:>6} {'cold' if cold else 'warm':>6} {r['ms']:>7.1f} {r['load_ms']:>8.2f}"
+                  f" {r['read_kb']:>9.0f} {r['anon_kb']:>9.0f} {r['file_kb']:>9.0f}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del rilevamento dei colpi con le maschere dei pixel.
+
+Confronta, su `ENEMIES` nemici sparsi attorno a un attacco:
+
+  * `rect`: `pg.sprite.groupcollide` sui soli `rect` (il metodo precedente);
+  * `mask cached`: `World._attacked_enemies`, broadphase sui `rect` e conferma
+    con le maschere in cache;
+  * `mask uncached`: `pg.sprite.collide_mask` con maschere generate ad ogni
+    controllo, come succederebbe senza cache.
+
+    python bench_masks.py
+"""
+
+import os
+import random
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from settings import *
+
+from entities import Enemy
+from governor import FrameGovernor
+from states import World
+
+ENEMIES = (10, 100, 1000)
+POSITIONS = 200
+REPEAT = 5
+
+
+class BenchGame:
+    """
+    Sostituisce `Game`: il `World` ne usa solo governatore e clock.
+    """
+
+    def __init__(self):
+        self.governor = FrameGovernor()
+        self.clock = pg.time.Clock()
+
+
+def uncached_collide(attack, enemy) -> bool:
+    return pg.sprite.collide_mask(_Uncached(attack), _Uncached(enemy)) is not None
+
+
+class _Uncached:
+    """
+    Espone solo `rect` e `image`: `collide_mask` genera la maschera ogni volta.
+    """
+
+    def __init__(self, sprite):
+        self.rect = sprite.rect
+        self.image = sprite.image
+
+
+def bench(world: World, count: int) -> dict:
+    world.enemies.empty()
+    width, height = VIEW_RES
+    for _ in range(count):
+        Enemy(random.randrange(width), random.randrange(height), [], world, world.enemies)
+
+    attack = world.player.attack()
+    attack.add(world.attacks)
+    positions = [(random.randrange(width), random.randrange(height)) for _ in range(POSITIONS)]
+
+    def run(detect):
+        hits = 0
+        for pos in positions:
+            attack.rect.center = pos
+            hits += sum(len(enemies) for enemies in detect().values())
+        return hits
+
+    methods = {
+        "rect": lambda: pg.sprite.groupcollide(world.attacks, world.enemies, False, False),
+        "mask cached": world._attacked_enemies,
+        "mask uncached": lambda: pg.sprite.groupcollide(world.attacks, world.enemies, False, False,
+                                                        uncached_collide),
+    }
+
+    result = {}
+    for name, detect in methods.items():
+        hits = run(detect)
+        seconds = min(timeit.repeat(lambda: run(detect), number=1, repeat=REPEAT))
+        result[name] = (seconds / POSITIONS * 1e6, hits)
+
+    world.player.end_attack()
+    attack.kill()
+    return result
+
+
+if __name__ == "__main__":
+    pg.init()
+    pg.display.set_mode(VIEW_RES)
+    random.seed(0)
+
+    world = World(BenchGame())
+    print(f"Microseconds per hit check (one attack), hits found over {POSITIONS} positions")
+    print(f"{'enemies':>8} {'method':>14} {'us':>10} {'hits':>6}")
+    for count in ENEMIES:
+        for name, (us, hits) in bench(world, count).items():
+            print(f"{count:>8} {name:>14} {us:>10.2f} {hits:>6}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della memoria occupata dalle entità.
+
+Per ogni tipo di entità ne crea `N` e misura con `tracemalloc` la memoria
+allocata, in byte per entità:
+
+  * `Wall`, `Enemy`: le sole entità, tenute in una lista;
+  * `Enemy in world`: nemici aggiunti ai gruppi del `World`, come in gioco.
+
+Le immagini vengono caricate prima della misura: i fotogrammi sono condivisi
+tra le entità dello stesso tipo. I pixel delle `Surface` sono allocati da SDL
+e non vengono visti da `tracemalloc`.
+
+    python bench_memory.py
+"""
+
+import gc
+import os
+import random
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from settings import *
+
+from bench_masks import BenchGame
+from entities import Enemy, Wall
+from states import World
+
+ENTITY_COUNTS = (10_000, 100_000)
+
+
+def measure(create, count: int) -> float:
+    """
+    Byte allocati per ogni entità creata da `create()`.
+    """
+    create()  # Carica le immagini condivise fuori dalla misura.
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    entities = [create() for _ in range(count)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_entity = (end - start) / count
+    for entity in entities:
+        entity.kill()
+    return per_entity
+
+
+def random_pos() -> tuple[int, int]:
+    width, height = VIEW_RES
+    return random.randrange(width), random.randrange(height)
+
+
+if __name__ == "__main__":
+    pg.init()
+    pg.display.set_mode(VIEW_RES)
+    random.seed(0)
+
+    world = World(BenchGame())
+    kinds = {
+        "Wall": lambda: Wall(*random_pos()),
+        "Enemy": lambda: Enemy(*random_pos(), [world.environment], world),
+        "Enemy in world": lambda: Enemy(*random_pos(), [world.environment], world,
+                                        world.enemies, world.actors, world.visible_entities),
+    }
+
+    print(f"{'entities':>8} {'kind':>16} {'bytes/entity':>13}")
+    for count in ENTITY_COUNTS:
+        for name, create in kinds.items():
+            print(f"{count:>8} {name:>16} {measure(create, count):>13.0f}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della sincronizzazione client/server.
+
+Avvia un server locale, aggiunge al mondo `N` nemici fermi, di cui solo
+`MOVING` vengono spostati ad ogni tick, e collega una flotta di client
+che ricevono e decodificano gli snapshot (senza disegnarli).
+
+Al crescere di `N`, banda e tempo di sincronizzazione per tick devono
+restare circa costanti (a parte i keyframe), mentre cresce solo il
+costo della simulazione.
+
+    python bench_network.py
+"""
+
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+from settings import *
+
+from entities import Enemy
+from network import Client, Server
+
+ENTITY_COUNTS = (100, 1000, 5000)
+MOVING = 20
+CLIENTS = 8
+TICKS = 300
+
+
+class IdleEnemy(Enemy):
+    """
+    Non insegue il giocatore: si muovono solo i nemici spostati dal benchmark.
+    """
+
+    __slots__ = ()
+
+    view_range = 0
+
+
+def populate(server: Server, count: int) -> list[Enemy]:
+    """
+    Aggiunge `count` nemici in punti casuali della stanza, lontani dai
+    giocatori: non devono ucciderli, altrimenti la partita ricomincia.
+    """
+    world = server.world
+    width, height = VIEW_RES
+    players = [player.pos for player in world.player_group]
+    enemies = []
+    while len(enemies) < count:
+        x, y = random.randrange(width), random.randrange(height)
+        if any(abs(x - px) < 2 * TILESIZE and abs(y - py) < 2 * TILESIZE for px, py in players):
+            continue
+        enemy = IdleEnemy(x, y, [world.environment], world, world.enemies, world.actors)
+        enemies.append(enemy)
+    return enemies
+
+
+def run(count: int) -> dict:
+    server = Server(("127.0.0.1", 0))
+    clients = [Client(server.address) for _ in range(CLIENTS)]
+
+    # Primi tick, esclusi dalla misura: il server accetta i client e ne crea
+    # i giocatori, poi invia i nemici aggiunti.
+    server.tick()
+    enemies = populate(server, count)
+    moving = enemies[:MOVING]
+    server.tick()
+    for client in clients:
+        client.poll()
+
+    start_bytes = server.stats.bytes_sent
+    start_keyframe_bytes = server.stats.keyframe_bytes
+    start_update = server.stats.update_time
+    start_sync = server.stats.sync_time
+    step = 1
+    for tick in range(TICKS):
+        step = -step if tick % 16 == 0 else step
+        for enemy in moving:
+            enemy.hitbox.x += step
+            enemy._update_rect()
+            server.world.entity_changed(enemy)
+
+        server.tick()
+        for client in clients:
+            client.poll()
+
+    for client in clients:
+        assert len(client.state.entities) == len(server.encoder)
+        client.close()
+    server.close()
+
+    keyframe_bytes = server.stats.keyframe_bytes - start_keyframe_bytes
+    delta_bytes = server.stats.bytes_sent - start_bytes - keyframe_bytes
+    return {
+        "entities": count,
+        "delta_bytes": delta_bytes / TICKS / CLIENTS,
+        "keyframe_bytes": keyframe_bytes / TICKS / CLIENTS,
+        "update_ms": (server.stats.update_time - start_update) / TICKS,
+        "sync_ms": (server.stats.sync_time - start_sync) / TICKS,
+    }
+
+
+if __name__ == "__main__":
+    pg.init()
+    pg.display.set_mode((1, 1))
+    random.seed(0)
+
+    print(f"{MOVING} moving entities, {CLIENTS} clients, {TICKS} ticks, "
+          f"keyframe every {KEYFRAME_INTERVAL} ticks")
+    print("Bytes are per client per tick, keyframes averaged over all ticks.")
+    print(f"{'entities':>9} {'delta bytes':>12} {'keyframe bytes':>15} {'update ms':>10} {'sync ms':>8}")
+    for count in ENTITY_COUNTS:
+        result = run(count)
+        print(f"{result['entities']:>9} {result['delta_bytes']:>12.1f} {result['keyframe_bytes']:>15.1f} "
+              f"{result['update_ms']:>10.3f} {result['sync_ms']:>8.3f}")
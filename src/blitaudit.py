@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Controllo, in modalità debug, dei formati delle surface disegnate.
+
+Un `blit` è veloce solo se la surface sorgente ha lo stesso formato della
+destinazione; altrimenti SDL converte i pixel ad ogni chiamata. Anche la
+trasparenza per pixel ha un costo, inutile se la surface è opaca o se i suoi
+pixel sono solo del tutto trasparenti od opachi (colorkey + `RLEACCEL`).
+
+L'auditor segnala, una sola volta per surface, ogni `blit` che non prende la
+strada più veloce. Si attiva con `python main.py --debug-blits`.
+"""
+
+import logging
+import weakref
+
+import pygame as pg
+
+logger = logging.getLogger(__name__)
+
+
+def _rgb_format(surface: pg.Surface) -> tuple:
+    """
+    Profondità e maschere RGB, ignorando il canale alpha.
+    """
+    return surface.get_bitsize(), surface.get_masks()[:3]
+
+
+def slow_blit_reasons(source: pg.Surface, dest: pg.Surface) -> list[str]:
+    """
+    Restituisce i motivi per cui il `blit` di `source` su `dest` è lento.
+    """
+    reasons = []
+    if _rgb_format(source) != _rgb_format(dest):
+        reasons.append(f"pixel format conversion ({source.get_bitsize()} bit -> {dest.get_bitsize()} bit)")
+
+    flags = source.get_flags()
+    if flags & pg.SRCALPHA:
+        size = source.get_width() * source.get_height()
+        opaque = pg.mask.from_surface(source, 254).count()
+        if opaque == size:
+            reasons.append("per-pixel alpha on an opaque surface: use convert()")
+        elif opaque == pg.mask.from_surface(source, 0).count():
+            reasons.append("per-pixel alpha with only on/off pixels: use a colorkey with RLEACCEL")
+    elif source.get_colorkey() is not None and not flags & (pg.RLEACCEL | pg.RLEACCELOK):
+        reasons.append("colorkey without RLEACCEL")
+    return reasons
+
+
+class BlitAuditor:
+
+    def __init__(self):
+        self.enabled = False
+        self.reports: list[str] = []
+        self._checked: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def check(self, source: pg.Surface, dest: pg.Surface, where: str):
+        """
+        Controlla il `blit` di `source` su `dest` fatto da `where`.
+        """
+        checked = self._checked.setdefault(source, set())
+        key = _rgb_format(dest)
+        if key in checked:
+            return
+        checked.add(key)
+
+        for reason in slow_blit_reasons(source, dest):
+            report = f"{where}: {source.get_size()} surface, {reason}"
+            self.reports.append(report)
+            logger.warning(report)
+
+
+AUDITOR = BlitAuditor()
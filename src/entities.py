@@ -11,7 +11,8 @@ import pygame as pg
 
 from settings import *
 
-from assets import Tileset
+from assets import Tileset, get_mask, load_image, optimize_surface
+from blitaudit import AUDITOR
 
 if TYPE_CHECKING:
     from states import World
@@ -24,8 +25,32 @@ class Direction(Enum):
     RIGHT = (1, 0)
 
 
+class FrameTable:
+    """
+    Tabella immutabile dei fotogrammi di un tipo di `Actor`,
+    condivisa da tutte le sue istanze.
+
+    Ogni clip (animazione, direzione) è identificata da un indice:
+    le istanze tengono solo quello, non i fotogrammi.
+    """
+
+    __slots__ = ("clips", "_ids")
+
+    def __init__(self, animations: dict[AnimationMachine.Animation, dict[Direction, list[pg.Surface]]]):
+        clips = {(animation, direction): tuple(frames)
+                 for animation, directions in animations.items()
+                 for direction, frames in directions.items()}
+        self._ids = {key: i for i, key in enumerate(clips)}
+        self.clips: tuple[tuple[pg.Surface, ...], ...] = tuple(clips.values())
+
+    def clip_id(self, animation: AnimationMachine.Animation, direction: Direction) -> int:
+        return self._ids[animation, direction]
+
+
 class AnimationMachine:
 
+    __slots__ = ("_sprite", "_animation_locked", "_clip", "_phase")
+
     class Animation(Enum):
         MOVE = 0
         ATK = 1
@@ -33,14 +58,26 @@ class AnimationMachine:
     animation_duration: int = 100
     default_animation = (Animation.MOVE, Direction.DOWN)
 
-    def __init__(self, sprite: pg.Sprite):
+    _frames: FrameTable = None
+
+    def __init__(self, sprite: Entity):
         self._sprite = sprite
         self._animation_locked = False
-        self._animations: dict[AnimationMachine.Animation, dict[Direction, list[pg.Surface]]] = self._init_animations()
+        self.frames()
         self._set_default_animation()
 
     def get_curr_image(self):
-        return self._curr_animation[int(self._curr_animation_loop)]
+        return self._frames.clips[self._clip][int(self._phase)]
+
+    @classmethod
+    def frames(cls) -> FrameTable:
+        """
+        Restituisce la tabella dei fotogrammi,
+        costruendola una volta sola per tipo.
+        """
+        if cls._frames is None:
+            cls._frames = FrameTable(cls._init_animations())
+        return cls._frames
 
     @classmethod
     def _init_animations(cls) -> dict[Animation, dict[Direction, list[pg.Surface]]]:
@@ -54,16 +91,18 @@ class AnimationMachine:
         self._set_animation(animation, direction)
 
     def _set_animation(self, animation: Animation, direction: Direction):
-        self._curr_animation = self._animations[animation][direction]
-        self._curr_animation_frames = len(self._curr_animation)
-        self._curr_animation_loop = 0.
+        self._set_clip(self._frames.clip_id(animation, direction))
+
+    def _set_clip(self, clip: int):
+        self._clip = clip
+        self._phase = 0.
 
     def update(self, dt):
         if self._animation_locked:
             return
 
         if not self._sprite.dir.magnitude():
-            self._curr_animation_loop = 0.
+            self._phase = 0.
             return
 
         animation = self.Animation.MOVE
@@ -71,17 +110,21 @@ class AnimationMachine:
 
         direction = Direction(xy)
 
-        if self._curr_animation is not self._animations[animation][direction]:
-            self._set_animation(animation, direction)
+        clip = self._frames.clip_id(animation, direction)
+        if clip != self._clip:
+            self._set_clip(clip)
             return
 
-        self._curr_animation_loop += dt / self.animation_duration
-        if self._curr_animation_loop >= self._curr_animation_frames:
-            self._curr_animation_loop -= self._curr_animation_frames
+        frames = len(self._frames.clips[clip])
+        self._phase += dt / self.animation_duration
+        if self._phase >= frames:
+            self._phase -= frames
 
 
 class EnemyAnimation(AnimationMachine):
 
+    __slots__ = ()
+
     @classmethod
     def _init_animations(cls):
         spritesheet = Tileset(IMAGES / "enemy_spritesheet.png", TILESIZE)
@@ -97,6 +140,8 @@ class EnemyAnimation(AnimationMachine):
 
 class PlayerAnimation(AnimationMachine):
 
+    __slots__ = ()
+
     def attack_animation(self):
         self._animation_locked = True
         animation = self.Animation.ATK
@@ -127,18 +172,95 @@ class PlayerAnimation(AnimationMachine):
         }
 
 
-class Entity(pg.sprite.Sprite):
+class Entity:
+    """
+    Entità di gioco.
+
+    Implementa il protocollo di `pg.sprite.Sprite`, per cui può essere
+    aggiunta ai `pg.sprite.Group`, ma usa `__slots__`: niente `__dict__`
+    per istanza e i gruppi di appartenenza in una tupla, invece che in
+    un dizionario. Le sottoclassi devono dichiarare i propri `__slots__`.
+
+    Per aggiungere o togliere un'entità da un gruppo si usano `add` e `remove`
+    dell'entità: `Group.add` e `Group.remove` funzionano, ma non riconoscendo
+    una `pg.sprite.Sprite` passano da un'eccezione per ogni entità.
+    """
+
+    __slots__ = ("rect", "_groups")
+
+    def __init__(self, *groups):
+        self._groups: tuple[pg.sprite.AbstractGroup, ...] = ()
+        if groups:
+            self.add(*groups)
+
+    def add(self, *groups):
+        for group in groups:
+            if hasattr(group, "_spritegroup"):
+                if group not in self._groups:
+                    group.add_internal(self)
+                    self.add_internal(group)
+            else:
+                self.add(*group)
+
+    def remove(self, *groups):
+        for group in groups:
+            if hasattr(group, "_spritegroup"):
+                if group in self._groups:
+                    group.remove_internal(self)
+                    self.remove_internal(group)
+            else:
+                self.remove(*group)
+
+    def add_internal(self, group: pg.sprite.AbstractGroup):
+        self._groups += (group,)
+
+    def remove_internal(self, group: pg.sprite.AbstractGroup):
+        self._groups = tuple(g for g in self._groups if g is not group)
+
+    def kill(self):
+        for group in self._groups:
+            group.remove_internal(self)
+        self._groups = ()
+
+    def groups(self) -> list[pg.sprite.AbstractGroup]:
+        return list(self._groups)
+
+    def alive(self) -> bool:
+        return bool(self._groups)
+
+    def update(self, *args, **kwargs):
+        pass
 
     @property
     def pos(self):
         return self.rect.midbottom
 
+    @property
+    def mask(self) -> pg.mask.Mask:
+        """
+        Maschera dei pixel dell'immagine corrente, usata anche
+        da `pg.sprite.collide_mask`.
+        """
+        return get_mask(self.image)
+
+    def collide_pixels(self, entity: Entity) -> bool:
+        """
+        `True` se i pixel non trasparenti delle due entità si sovrappongono.
+        Va chiamato solo su coppie i cui `rect` collidono.
+        """
+        offset = (entity.rect.x - self.rect.x, entity.rect.y - self.rect.y)
+        return self.mask.overlap(entity.mask, offset) is not None
+
     def draw(self, surface: pg.Surface):
+        if AUDITOR.enabled:
+            AUDITOR.check(self.image, surface, type(self).__name__)
         surface.blit(self.image, self.rect)
 
 
 class Attack(Entity):
 
+    __slots__ = ("player", "dir", "image", "_attack_animation_start")
+
     damage: int = None
     animation_time: int = None
 
@@ -150,16 +272,28 @@ class Attack(Entity):
         self.rect = self.image.get_rect()
         self._attack_animation_start = pg.time.get_ticks()
 
+    _surfaces: dict[Direction, pg.Surface] = None
+
     def _get_surface(self) -> pg.Surface:
-        sword_down = pg.image.load(IMAGES / "sword_y.png").convert_alpha()
-        sword_right = pg.image.load(IMAGES / "sword_x.png").convert_alpha()
-        surfaces = {
-            Direction.DOWN: sword_down,
-            Direction.UP: pg.transform.rotate(sword_down, 180),
-            Direction.LEFT: pg.transform.rotate(sword_right, 180),
-            Direction.RIGHT: sword_right,
-        }
-        return surfaces[Direction(self.dir.xy)]
+        return self.get_surfaces()[Direction(self.dir.xy)]
+
+    @classmethod
+    def get_surfaces(cls) -> dict[Direction, pg.Surface]:
+        """
+        Restituisce le immagini dell'attacco per ogni direzione,
+        caricandole una volta sola.
+        """
+        if cls._surfaces is None:
+            sword_down = load_image(IMAGES / "sword_y.png")
+            sword_right = load_image(IMAGES / "sword_x.png")
+            surfaces = {
+                Direction.DOWN: sword_down,
+                Direction.UP: pg.transform.rotate(sword_down, 180),
+                Direction.LEFT: pg.transform.rotate(sword_right, 180),
+                Direction.RIGHT: sword_right,
+            }
+            cls._surfaces = {d: optimize_surface(s) for d, s in surfaces.items()}
+        return cls._surfaces
 
     def update(self):
         self._move()
@@ -187,22 +321,39 @@ class Attack(Entity):
 
 class Sword(Attack):
 
+    __slots__ = ()
+
     damage = 1
     animation_time = 200
 
 
 class Wall(Entity):
 
+    __slots__ = ("image",)
+
+    _tiles: list[pg.Surface] = None
+
     def __init__(self, x: int, y: int, *args):
         super().__init__(*args)
-        tiles: list[pg.Surface] = Tileset(IMAGES / "rock_tileset.png", TILESIZE).images_at_row(0)
-        self.image = random.choice(tiles)
+        self.image = random.choice(self._get_tiles())
         self.rect = self.image.get_rect()
         self.rect.topleft = x, y
 
+    @classmethod
+    def _get_tiles(cls) -> list[pg.Surface]:
+        """
+        Il tileset è condiviso da tutti i muri: lo carico una volta sola.
+        """
+        if cls._tiles is None:
+            cls._tiles = Tileset(IMAGES / "rock_tileset.png", TILESIZE).images_at_row(0)
+        return cls._tiles
+
 
 class Actor(Entity):
 
+    __slots__ = ("_world", "_animation", "facing", "hitbox", "dir", "_colliding_entities",
+                 "hp", "last_damage", "_animation_dt", "_animation_frame")
+
     animation_type: Type[AnimationMachine] = None
     speed: int = None
     max_hp: int = None
@@ -219,12 +370,15 @@ class Actor(Entity):
         self.rect = self.image.get_rect()
         self.hitbox = self.rect.inflate(-8, -8)
         self.dir = pg.math.Vector2()
-        self._colliding_entities = colliding
+        self._colliding_entities = tuple(colliding)
 
         self.hitbox.midbottom = self.rect.midbottom = x, y
         self.hp = self.max_hp
         self.last_damage = 0.
 
+        self._animation_dt = 0
+        self._animation_frame = 0
+
     @property
     def image(self) -> pg.Surface:
         return self._animation.get_curr_image()
@@ -240,7 +394,20 @@ class Actor(Entity):
         self._move_and_collide(dt)
         self._update_rect()
         self._set_facing()
-        self._animation.update(dt)
+        self._update_animation(dt)
+
+    def _update_animation(self, dt):
+        """
+        Aggiorna l'animazione una volta ogni `animation_step` frame,
+        in base al livello di qualità corrente.
+        """
+        self._animation_dt += dt
+        self._animation_frame += 1
+        if self._animation_frame % self._world.quality.animation_step:
+            return
+
+        self._animation.update(self._animation_dt)
+        self._animation_dt = 0
 
     def _update_rect(self):
         self.rect.midbottom = self.hitbox.midbottom
@@ -261,9 +428,13 @@ class Actor(Entity):
         """
         Gestisce l'input utente legato al movimento del giocatore.
         """
+        was_moving = self.dir.magnitude() != 0
         self._update_dir()
 
         if self.dir.magnitude() == 0:
+            if was_moving:
+                # Anche fermarsi cambia lo stato visibile (animazione).
+                self._world.entity_changed(self)
             return
 
         self.dir.normalize_ip()
@@ -273,6 +444,7 @@ class Actor(Entity):
         self._move_x(x)
         self._move_y(y)
         self._collide_window()
+        self._world.entity_changed(self)
 
     def _move_x(self, value):
         """
@@ -361,7 +533,7 @@ class Actor(Entity):
         """
         self.hitbox.top = y
 
-    def collide(self, entity: pg.sprite.Sprite) -> bool:
+    def collide(self, entity: Entity) -> bool:
         """
         `True` se le due entità collidono.
         """
@@ -379,6 +551,7 @@ class Actor(Entity):
 
         self.last_damage = t
         self.hp -= dmg
+        self._world.entity_changed(self)
         if self.hp <= 0:
             self._die()
         return True
@@ -392,33 +565,38 @@ class Actor(Entity):
 
 class Enemy(Actor):
 
+    __slots__ = ()
+
     animation_type = EnemyAnimation
     speed = .08
     view_range = 64
     max_hp = 1
     damage = 1
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._player: Player = self._world.player
-
     def _update_dir(self):
         """
-        Aggiorna il vettore direzione.
+        Aggiorna il vettore direzione, verso il giocatore più vicino tra quelli visibili.
         """
-        px, py = self._player.pos
+        player = self._world.target_of(self)
+        if player is None:
+            self.dir.xy = 0, 0
+            return
+
+        px, py = player.pos
         ex, ey = self.pos
         self.dir.xy = px - ex, py - ey
 
         if self.dir.magnitude() > self.view_range:
             self.dir.xy = 0, 0
 
-    def damage_player(self) -> bool:
-        return self._player.suffer_damage(self.damage)
+    def damage_player(self, player: Player) -> bool:
+        return player.suffer_damage(self.damage)
 
 
 class Player(Actor):
 
+    __slots__ = ("_attack_type", "_attack")
+
     animation_type = PlayerAnimation
     speed = .2
     max_hp = 3
@@ -432,11 +610,13 @@ class Player(Actor):
         if not self.is_attacking():
             self._attack = self._attack_type(self)
             self._animation.attack_animation()
+            self._world.entity_changed(self)
         return self._attack
 
     def end_attack(self):
         self._attack = None
         self._animation.end_attack_animation()
+        self._world.entity_changed(self)
 
     def is_attacking(self):
         return bool(self._attack)
@@ -450,6 +630,60 @@ class Player(Actor):
         self.dir.x = keys[pg.K_RIGHT] - keys[pg.K_LEFT]
         self.dir.y = keys[pg.K_DOWN] - keys[pg.K_UP]  # Nota: asse delle y invertito in Pygame.
 
+    def _collide_window(self):
+        """
+        Se il giocatore esce dal bordo della finestra ed esiste
+        una stanza in quella direzione, ci si sposta nella stanza.
+        """
+        right, bottom = VIEW_RES
+        r = self.hitbox
+
+        direction = None
+        if r.top < 0:
+            direction = Direction.UP
+        elif r.bottom > bottom:
+            direction = Direction.DOWN
+        elif r.left < 0:
+            direction = Direction.LEFT
+        elif r.right > right:
+            direction = Direction.RIGHT
+
+        if direction is None or not self._world.change_room(direction, self):
+            super()._collide_window()
+
+    def entry_hitbox(self, direction: Direction) -> pg.Rect:
+        """
+        Restituisce la hitbox che avrà il giocatore entrando nella stanza
+        adiacente, sul bordo opposto a quello da cui esce muovendosi
+        in direzione `direction`.
+        """
+        hitbox = self.hitbox.copy()
+        right, bottom = VIEW_RES
+        if direction is Direction.UP:
+            hitbox.bottom = bottom
+        elif direction is Direction.DOWN:
+            hitbox.top = 0
+        elif direction is Direction.LEFT:
+            hitbox.right = right
+        elif direction is Direction.RIGHT:
+            hitbox.left = 0
+        return hitbox
+
+    def place_at(self, center: tuple[float, float]):
+        """
+        Sposta il giocatore centrandone la hitbox in `center`.
+        """
+        self.hitbox.center = center
+        self._update_rect()
+
+    def enter_from(self, direction: Direction):
+        """
+        Posiziona il giocatore sul bordo opposto a quello da cui
+        è uscito muovendosi in direzione `direction`.
+        """
+        self.hitbox.topleft = self.entry_hitbox(direction).topleft
+        self._update_rect()
+
     def _die(self):
         super()._die()
         self._world.game_over()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Governatore del budget di frame.
+
+Misura quanto costano update e render di ogni frame rispetto al budget
+(1000 / FPS millisecondi) e reagisce quando il gioco non ce la fa:
+
+  * salta il render (ma mai l'update, la simulazione deve procedere) dei
+    frame che sforerebbero il budget;
+  * abbassa il livello di qualità, riducendo il lavoro opzionale, se il
+    carico resta alto per un po' e lo rialza quando torna del margine.
+    Le soglie di discesa e di risalita sono diverse (isteresi), così
+    da non oscillare continuamente tra due livelli.
+
+Tutte le decisioni vengono registrate in `GovernorStats`.
+"""
+
+import time
+
+from collections import deque
+from enum import Enum
+
+from settings import *
+
+
+class Quality(Enum):
+    HIGH = 0
+    MEDIUM = 1
+    LOW = 2
+
+    @property
+    def animation_step(self) -> int:
+        """
+        Ogni quanti frame vengono aggiornate le animazioni.
+        """
+        return 1 << self.value
+
+    @property
+    def full_redraw(self) -> bool:
+        """
+        `True` se ogni frame va ridisegnato da zero, altrimenti
+        vengono ridisegnate solo le aree cambiate (dirty rect).
+        """
+        return self is Quality.HIGH
+
+
+class GovernorStats:
+    """
+    Statistiche e storico delle decisioni del governatore.
+    """
+
+    def __init__(self, history: int = 100):
+        self.frames = 0
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+        self.over_budget_frames = 0
+        self.quality_changes = 0
+        self.update_time = 0.
+        self.render_time = 0.
+        self.frames_at_quality = {quality: 0 for quality in Quality}
+        # Ultime decisioni prese: (frame, decisione, qualità).
+        self.decisions: deque[tuple[int, str, Quality]] = deque(maxlen=history)
+
+    def as_dict(self) -> dict:
+        rendered = max(self.rendered_frames, 1)
+        frames = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "rendered_frames": self.rendered_frames,
+            "skipped_frames": self.skipped_frames,
+            "over_budget_frames": self.over_budget_frames,
+            "over_budget_ratio": self.over_budget_frames / frames,
+            "quality_changes": self.quality_changes,
+            "avg_update_ms": self.update_time / frames,
+            "avg_render_ms": self.render_time / rendered,
+            "frames_at_quality": {q.name: n for q, n in self.frames_at_quality.items()},
+        }
+
+
+class FrameGovernor:
+
+    # Frequenza con cui la media mobile esponenziale segue le nuove misure.
+    smoothing: float = .1
+    # Carico (costo / budget) oltre il quale si scende di qualità...
+    high_load: float = .9
+    # ...e sotto al quale si risale.
+    low_load: float = .6
+    # Numero di frame consecutivi oltre/sotto soglia prima di cambiare qualità.
+    downgrade_frames: int = 30
+    upgrade_frames: int = 180
+    # Numero massimo di render saltati di fila: lo schermo deve comunque aggiornarsi.
+    max_skipped_frames: int = 3
+
+    def __init__(self, fps: int = FPS):
+        self.budget = 1000 / fps
+        self.quality = Quality.HIGH
+        self.stats = GovernorStats()
+
+        self._avg_update = 0.
+        self._avg_render = 0.
+        self._over_frames = 0
+        self._under_frames = 0
+        self._skipped_in_a_row = 0
+
+        self._frame_start = 0.
+        self._update_cost = 0.
+        self._render_start = None
+
+    @property
+    def load(self) -> float:
+        """
+        Costo medio di un frame in rapporto al budget.
+        """
+        return (self._avg_update + self._avg_render) / self.budget
+
+    def _log(self, decision: str):
+        self.stats.decisions.append((self.stats.frames, decision, self.quality))
+
+    def start_frame(self):
+        self._frame_start = time.perf_counter()
+        self._render_start = None
+
+    def should_render(self) -> bool:
+        """
+        Da chiamare dopo l'update. Restituisce `False` se il render di questo
+        frame va saltato perché farebbe sforare il budget.
+        """
+        now = time.perf_counter()
+        self._update_cost = (now - self._frame_start) * 1000
+        self._avg_update += (self._update_cost - self._avg_update) * self.smoothing
+
+        if (self._update_cost + self._avg_render > self.budget
+                and self._skipped_in_a_row < self.max_skipped_frames):
+            self._skipped_in_a_row += 1
+            self.stats.skipped_frames += 1
+            self._log("skip render")
+            return False
+
+        self._skipped_in_a_row = 0
+        self._render_start = now
+        return True
+
+    def end_frame(self):
+        """
+        Da chiamare a fine frame: aggiorna statistiche e qualità.
+        """
+        stats = self.stats
+        now = time.perf_counter()
+        cost = (now - self._frame_start) * 1000
+
+        stats.frames += 1
+        stats.frames_at_quality[self.quality] += 1
+        stats.update_time += self._update_cost
+
+        if self._render_start is not None:
+            render_cost = (now - self._render_start) * 1000
+            self._avg_render += (render_cost - self._avg_render) * self.smoothing
+            stats.rendered_frames += 1
+            stats.render_time += render_cost
+
+        if cost > self.budget:
+            stats.over_budget_frames += 1
+
+        self._update_quality()
+
+    def _update_quality(self):
+        load = self.load
+        self._over_frames = self._over_frames + 1 if load > self.high_load else 0
+        self._under_frames = self._under_frames + 1 if load < self.low_load else 0
+
+        value = self.quality.value
+        if self._over_frames >= self.downgrade_frames and value < Quality.LOW.value:
+            self._set_quality(Quality(value + 1))
+        elif self._under_frames >= self.upgrade_frames and value > Quality.HIGH.value:
+            self._set_quality(Quality(value - 1))
+
+    def _set_quality(self, quality: Quality):
+        self.quality = quality
+        self._over_frames = self._under_frames = 0
+        self.stats.quality_changes += 1
+        self._log(f"quality {quality.name}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HUD (Head-Up Display) di gioco: cuori, nemici rimasti, tempo e FPS.
+
+L'HUD viene disegnato su una propria `Surface` trasparente che resta in cache:
+ogni widget viene ridisegnato solo quando il valore a cui è legato cambia,
+per cui, se non cambia nulla, disegnare l'HUD costa un solo `blit` per frame.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable
+
+import pygame as pg
+
+from settings import *
+
+from assets import COLORKEY, Tileset, TextCache
+
+if TYPE_CHECKING:
+    from states import World
+
+
+class Widget:
+    """
+    Elemento dell'HUD legato a un valore.
+
+    `getter` è una funzione senza argomenti che restituisce il valore
+    da visualizzare: il widget viene renderizzato di nuovo solo
+    quando questo valore cambia.
+    """
+
+    def __init__(self, getter: Callable[[], Any], **position):
+        self._getter = getter
+        self._position = position
+        self._value = None
+        self.image: pg.Surface | None = None
+        self.rect = pg.Rect(0, 0, 0, 0)
+
+    def refresh(self) -> pg.Rect | None:
+        """
+        Aggiorna il widget se il valore è cambiato.
+        Restituisce l'area dell'HUD da ridisegnare, oppure `None`.
+        """
+        value = self._getter()
+        if self.image is not None and value == self._value:
+            return None
+
+        old_rect = self.rect
+        self._value = value
+        self.image = self.render(value)
+        self.rect = self.image.get_rect(**self._position)
+        if not old_rect:
+            return self.rect.copy()
+        return old_rect.union(self.rect)
+
+    def render(self, value) -> pg.Surface:
+        """
+        Restituisce la `Surface` che rappresenta `value`.
+        """
+        raise NotImplementedError
+
+
+class TextWidget(Widget):
+
+    def __init__(self, getter: Callable[[], Any], text_cache: TextCache,
+                 fmt: str = "{}", size: int = 8, color=YELLOW, **position):
+        super().__init__(getter, **position)
+        self._text_cache = text_cache
+        self._fmt = fmt
+        self._size = size
+        self._color = color
+
+    def render(self, value) -> pg.Surface:
+        text = self._fmt.format(value)
+        return self._text_cache.render(FONTS / "NormalFont.ttf", self._size, text, self._color)
+
+
+class HeartsWidget(Widget):
+    """
+    Mostra i punti vita come una fila di cuori.
+    """
+
+    def __init__(self, getter: Callable[[], tuple[int, int]], **position):
+        super().__init__(getter, **position)
+        hearts = Tileset(IMAGES / "Heart.png", TILESIZE).images_at_row(0)
+        self._full_heart = hearts[0]
+        self._empty_heart = hearts[-1]
+
+    def render(self, value: tuple[int, int]) -> pg.Surface:
+        hp, max_hp = value
+        image = pg.Surface((max_hp * TILESIZE, TILESIZE), pg.SRCALPHA)
+        for i in range(max_hp):
+            heart = self._full_heart if i < hp else self._empty_heart
+            image.blit(heart, (i * TILESIZE, 0))
+        return image
+
+
+class Hud:
+    """
+    Raccoglie i widget e li compone su una `Surface` in cache.
+
+    La `Surface` usa un colorkey al posto della trasparenza per pixel:
+    i widget sono pixel art, senza pixel semitrasparenti. Niente `RLEACCEL`:
+    l'HUD viene ridisegnato almeno una volta al secondo e ogni modifica
+    costringerebbe SDL a ricodificare tutta la surface.
+    """
+
+    def __init__(self, size: tuple[int, int] = VIEW_RES):
+        self.surface = pg.Surface(size).convert()
+        self.surface.fill(COLORKEY)
+        self.surface.set_colorkey(COLORKEY)
+        self.widgets: list[Widget] = []
+
+    def add(self, widget: Widget) -> Widget:
+        self.widgets.append(widget)
+        return widget
+
+    def update(self):
+        """
+        Ridisegna sulla `Surface` dell'HUD solo le aree
+        dei widget il cui valore è cambiato.
+        """
+        dirty = [rect for rect in (w.refresh() for w in self.widgets) if rect is not None]
+        if not dirty:
+            return
+
+        for rect in dirty:
+            self.surface.fill(COLORKEY, rect)
+
+        # Un widget può sovrapporsi a un'area appena pulita: lo ridisegno.
+        for widget in self.widgets:
+            if widget.rect.collidelist(dirty) != -1:
+                self.surface.blit(widget.image, widget.rect)
+
+    def draw(self, surface: pg.Surface, rects: list[pg.Rect] | None = None):
+        """
+        Disegna l'HUD su `surface`, oppure solo le aree `rects`.
+        """
+        if rects is None:
+            surface.blit(self.surface, (0, 0))
+            return
+
+        for rect in rects:
+            surface.blit(self.surface, rect, rect)
+
+
+def world_hud(world: World) -> Hud:
+    """
+    Crea l'HUD standard del `World`.
+    """
+    text_cache = TextCache()
+    hud = Hud()
+    width, _ = VIEW_RES
+    hud.add(HeartsWidget(lambda: (max(world.player.hp, 0), world.player.max_hp), topleft=(2, 2)))
+    hud.add(TextWidget(lambda: len(world.enemies), text_cache, "NEMICI {}", topright=(width - 2, 2)))
+    hud.add(TextWidget(lambda: world.elapsed // 1000, text_cache, "TEMPO {}", topright=(width - 2, 12)))
+    hud.add(TextWidget(lambda: round(world.game.clock.get_fps()), text_cache, "FPS {}", topright=(width - 2, 22)))
+    return hud
@@ -1,15 +1,26 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import asyncio
+import logging
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from typing import Callable, Coroutine
 
 import pygame as pg
 
 from settings import *
+from assets import configure_mixer
+from blitaudit import AUDITOR
+from governor import FrameGovernor
+from network import Client, RemoteView, run_server
 from states import State, World, Pause, GameOver
 
+logger = logging.getLogger(__name__)
+
 
 class GameStates(Enum):
     PLAY = 0
@@ -22,18 +33,36 @@ class Game:
     Classe principale di gioco.
     """
 
-    def __init__(self):
+    # Margine (in secondi) prima della scadenza del frame entro il quale il loop
+    # asyncio smette di dormire e cede il controllo solo per brevi istanti.
+    pacing_margin: float = .002
+
+    def __init__(self, server_address=None, overworld=None, use_asyncio: bool = False):
+        configure_mixer()  # Il mixer deve usare il formato dei suoni nel pacchetto.
         pg.init()  # Inizializza i moduli di pygame.
         self.screen = self._init_screen()
+        self.governor = FrameGovernor(FPS)
 
-        self.states: dict[GameStates, State] = {GameStates.PLAY: World(self),
+        # Se è specificato un server, il mondo viene simulato lì e noi lo disegnamo.
+        if server_address is None:
+            play_state = World(self) if overworld is None else World(self, **overworld)
+        else:
+            play_state = RemoteView(self, Client(server_address))
+
+        self.states: dict[GameStates, State] = {GameStates.PLAY: play_state,
                                                 GameStates.PAUSE: Pause(self),
                                                 GameStates.GAME_OVER: GameOver(self)}
 
-        self.active_state = World(self)
+        self.active_state = play_state
 
         self.clock = pg.time.Clock()
-        self.run_game_loop()
+        self._tasks: set[asyncio.Task] = set()
+        self._executor: ThreadPoolExecutor | None = None
+
+        if use_asyncio:
+            asyncio.run(self.run_game_loop_async())
+        else:
+            self.run_game_loop()
 
     def _init_screen(self) -> pg.Surface:
         """
@@ -59,11 +88,90 @@ class Game:
           * Render.
 
         """
-        while True:                            # Game loop.
-            delta_time = self.clock.tick(60)   # Limita il framerate e restituisce il tempo trascorso dall'ultimo frame.
-            self.process_events(delta_time)    # Input.
-            self.update(delta_time)            # Update.
-            self.draw()                        # Render.
+        while True:                             # Game loop.
+            delta_time = self.clock.tick(FPS)   # Limita il framerate e restituisce il tempo trascorso dall'ultimo frame.
+            self.run_frame(delta_time)
+
+    async def run_game_loop_async(self):
+        """
+        Alternativa a `run_game_loop` basata su asyncio.
+
+        Invece di dormire dentro `clock.tick`, tra un frame e l'altro il
+        controllo torna all'event loop, che nel frattempo esegue le coroutine
+        avviate con `spawn`. Il lavoro pesante o bloccante va eseguito con
+        `run_in_executor`: una coroutine che non cede il controllo ritarda
+        il frame successivo.
+        """
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="game")
+        frame_time = 1 / FPS
+        deadline = loop.time()
+        try:
+            while True:
+                self.run_frame(self.clock.tick())
+                deadline += frame_time
+                await self._wait_until(deadline)
+                if loop.time() > deadline + frame_time:
+                    # Siamo in ritardo di più di un frame: non cerchiamo di recuperare.
+                    deadline = loop.time()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _wait_until(self, deadline: float):
+        """
+        Cede il controllo all'event loop fino a `deadline`.
+
+        `asyncio.sleep` può svegliarsi con circa un millisecondo di ritardo:
+        si dorme fino a `pacing_margin` prima della scadenza e poi si cede il
+        controllo a brevi intervalli, così che le altre coroutine possano
+        continuare a girare senza far sforare la scadenza.
+        """
+        loop = asyncio.get_running_loop()
+        delay = deadline - self.pacing_margin - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # Anche se siamo in ritardo, cediamo il controllo almeno una volta.
+        await asyncio.sleep(0)
+        while loop.time() < deadline:
+            await asyncio.sleep(0)
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        """
+        Avvia una coroutine in background, tra un frame e l'altro.
+        Disponibile solo con il loop asyncio.
+        """
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background task failed", exc_info=task.exception())
+
+    async def run_in_executor(self, func: Callable, *args):
+        """
+        Esegue `func(*args)` in un thread, senza bloccare il game loop.
+        Disponibile solo con il loop asyncio.
+        """
+        if self._executor is None:
+            raise RuntimeError("run_in_executor requires the asyncio game loop")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def run_frame(self, delta_time: int):
+        """
+        Esegue un singolo frame. Il render dei frame che
+        sforano il budget viene saltato (vedi `FrameGovernor`).
+        """
+        self.governor.start_frame()
+        self.process_events(delta_time)     # Input.
+        self.update(delta_time)             # Update.
+        if self.governor.should_render():
+            self.draw()                     # Render.
+        self.governor.end_frame()
 
     def process_events(self, dt: int):
         """
@@ -118,6 +226,49 @@ class Game:
         self.active_state = play_state
 
 
+def parse_address(address: str):
+    """
+    `host:porta` per TCP, altrimenti il percorso di un socket Unix.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
 if __name__ == '__main__':
-    Game()  # Crea un'istanza di `Game`, avviando il gioco.
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--server", metavar="ADDRESS", nargs="?", const="{}:{}".format(*SERVER_ADDRESS),
+                        help="avvia un server senza finestra (host:porta o socket Unix)")
+    parser.add_argument("--connect", metavar="ADDRESS",
+                        help="gioca collegandosi a un server (host:porta o socket Unix)")
+    parser.add_argument("--debug-blits", action="store_true",
+                        help="segnala i blit di surface in un formato lento")
+    parser.add_argument("--generate", choices=("caves", "rooms"),
+                        help="gioca su una mappa generata proceduralmente")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), default=(160, 110),
+                        help="dimensioni in tile della mappa generata")
+    parser.add_argument("--seed", type=int, help="seed della mappa generata")
+    parser.add_argument("--asyncio", action="store_true",
+                        help="usa il game loop basato su asyncio")
+    args = parser.parse_args()
+
+    overworld = None
+    if args.generate:
+        # NumPy serve solo per generare le mappe: lo importo solo qui.
+        from mapgen import cave_map, rooms_map, split_rooms, start_room
+
+        generator = cave_map if args.generate == "caves" else rooms_map
+        rooms = split_rooms(generator(*args.size, seed=args.seed))
+        overworld = {"overworld": rooms, "start_room": start_room(rooms)}
+
+    if args.debug_blits:
+        logging.basicConfig(format="%(name)s: %(message)s")
+        AUDITOR.enabled = True
+
+    if args.server:
+        run_server(parse_address(args.server))
+    else:
+        # Crea un'istanza di `Game`, avviando il gioco.
+        Game(parse_address(args.connect) if args.connect else None, overworld, args.asyncio)
 
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generatore procedurale di mappe, basato su NumPy.
+
+Le mappe usano la stessa grammatica di `World.world_map` (`W`, `P`, `E`
+e spazio) e possono essere grandi a piacere: `split_rooms` le divide in
+stanze grandi quanto lo schermo, da usare come overworld del `World`.
+
+Sono disponibili due generatori, entrambi riproducibili a partire da un seed:
+
+  * `cave_map`: caverne con un automa cellulare;
+  * `rooms_map`: stanze rettangolari collegate da corridoi.
+
+In entrambi i casi tutte le zone libere sono raggiungibili dal giocatore:
+quelle non collegate al punto di partenza vengono riempite di muri.
+
+    python mapgen.py [caves|rooms] [larghezza] [altezza] [seed]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from settings import *
+
+WALL = ord("W")
+FLOOR = ord(" ")
+PLAYER = ord("P")
+ENEMY = ord("E")
+
+
+def _neighbours(walls: np.ndarray) -> np.ndarray:
+    """
+    Conta, per ogni cella, i muri tra le 8 celle vicine.
+    Fuori dalla mappa è tutto muro.
+    """
+    padded = np.pad(walls.astype(np.uint8), 1, constant_values=1)
+    h, w = walls.shape
+    count = np.zeros((h, w), np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dx != 1 or dy != 1:
+                count += padded[dy:dy + h, dx:dx + w]
+    return count
+
+
+def _label_regions(floor: np.ndarray) -> np.ndarray:
+    """
+    Etichetta le regioni di celle libere connesse (in 4 direzioni).
+    Restituisce una matrice con -1 sui muri e, sulle celle libere,
+    l'etichetta della regione.
+
+    Invece di visitare le celle una ad una, lavora sui segmenti orizzontali
+    di celle libere, unendo quelli che si toccano tra righe consecutive.
+    """
+    h, w = floor.shape
+    padded = np.zeros((h, w + 2), np.int8)
+    padded[:, 1:-1] = floor
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    runs = len(starts)
+
+    # Due segmenti in righe consecutive si toccano se i loro intervalli si sovrappongono.
+    # I segmenti sono ordinati per riga e poi per colonna: per ogni segmento della
+    # riga successiva bastano due ricerche binarie sugli inizi e sulle fine.
+    row_first = np.searchsorted(start_rows, np.arange(h + 1))
+    key = start_rows.astype(np.int64) * (w + 1)
+    below = start_rows < h - 1
+    run_ids = np.nonzero(below)[0]
+    next_rows = start_rows[run_ids] + 1
+    lo = np.searchsorted(key + ends, next_rows * (w + 1) + starts[run_ids], side="right")
+    hi = np.searchsorted(key + starts, next_rows * (w + 1) + ends[run_ids], side="left")
+    lo = np.maximum(lo, row_first[next_rows])
+    counts = np.maximum(hi - lo, 0)
+    a = np.repeat(run_ids, counts)
+    b = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    # Union-find vettoriale: aggancio le radici maggiori alle minori e
+    # comprimo i percorsi finché ogni coppia non ha la stessa radice.
+    parent = np.arange(runs)
+    while True:
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        pa, pb = parent[a], parent[b]
+        if np.array_equal(pa, pb):
+            break
+        np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+
+    labels = np.full((h, w), -1, np.int64)
+    lengths = ends - starts
+    rows = np.repeat(start_rows, lengths)
+    cols = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    labels[rows, cols] = np.repeat(parent, lengths)
+    return labels
+
+
+def _finalize(walls: np.ndarray, rng: np.random.Generator, enemy_density: float) -> list[str]:
+    """
+    Sceglie il punto di partenza nella regione libera più grande, riempie
+    di muri le regioni non raggiungibili da lì e piazza i nemici.
+    """
+    labels = _label_regions(~walls)
+    if not (labels >= 0).any():
+        raise ValueError("The generated map has no free cells")
+
+    region = np.bincount(labels[labels >= 0]).argmax()
+    reachable = labels == region
+
+    grid = np.full(walls.shape, WALL, np.uint8)
+    grid[reachable] = FLOOR
+
+    cells = np.flatnonzero(reachable)
+    spawn = rng.choice(cells)
+    enemies = rng.choice(cells, int(len(cells) * enemy_density), replace=False)
+    grid.flat[enemies] = ENEMY
+    grid.flat[spawn] = PLAYER
+
+    return [row.tobytes().decode() for row in grid]
+
+
+def cave_map(width: int, height: int, seed: int | None = None, fill: float = .45,
+             steps: int = 4, enemy_density: float = .005) -> list[str]:
+    """
+    Genera una caverna: parte da muri casuali (con probabilità `fill`) e
+    applica `steps` volte la regola "muro se almeno 5 vicini sono muri".
+    """
+    rng = np.random.default_rng(seed)
+    walls = rng.random((height, width)) < fill
+    for _ in range(steps):
+        count = _neighbours(walls)
+        walls = (count >= 5) | (walls & (count == 4))
+
+    walls[[0, -1], :] = walls[:, [0, -1]] = True
+    return _finalize(walls, rng, enemy_density)
+
+
+def rooms_map(width: int, height: int, seed: int | None = None, room_size: tuple[int, int] = (4, 12),
+              room_density: float = .004, enemy_density: float = .005) -> list[str]:
+    """
+    Genera stanze rettangolari di lato compreso in `room_size`, ognuna
+    collegata alla precedente da un corridoio a L. Il numero di stanze
+    è proporzionale all'area, secondo `room_density`.
+    """
+    rng = np.random.default_rng(seed)
+    walls = np.ones((height, width), bool)
+
+    count = max(int(width * height * room_density), 1)
+    low, high = room_size
+    sizes_w = rng.integers(low, high + 1, count).clip(max=width - 2)
+    sizes_h = rng.integers(low, high + 1, count).clip(max=height - 2)
+    xs = (rng.random(count) * (width - 1 - sizes_w)).astype(int) + 1
+    ys = (rng.random(count) * (height - 1 - sizes_h)).astype(int) + 1
+    cx, cy = xs + sizes_w // 2, ys + sizes_h // 2
+
+    # Collego le stanze in ordine "a serpentina" per fasce orizzontali,
+    # così che stanze consecutive siano vicine e i corridoi brevi.
+    band = cy // (2 * high)
+    order = np.lexsort((np.where(band % 2, -cx, cx), band))
+    xs, ys, sizes_w, sizes_h, cx, cy = (v[order] for v in (xs, ys, sizes_w, sizes_h, cx, cy))
+
+    for i in range(count):
+        walls[ys[i]:ys[i] + sizes_h[i], xs[i]:xs[i] + sizes_w[i]] = False
+        if i:
+            x0, x1 = sorted((cx[i - 1], cx[i]))
+            y0, y1 = sorted((cy[i - 1], cy[i]))
+            walls[cy[i - 1], x0:x1 + 1] = False
+            walls[y0:y1 + 1, cx[i]] = False
+
+    return _finalize(walls, rng, enemy_density)
+
+
+def split_rooms(layout: list[str], room_tiles: tuple[int, int] = SCREEN_TILES) -> dict[tuple[int, int], list[str]]:
+    """
+    Divide una mappa in stanze grandi `room_tiles`, utilizzabili come
+    `World.overworld`. Le stanze sul bordo vengono completate con muri.
+
+    NOTA: i tagli tra le stanze non tengono conto della mappa, per cui sul
+          bordo di una stanza ci può essere un passaggio che nella stanza
+          accanto finisce contro un muro. È `World.change_room` a bloccare
+          il cambio di stanza se i tile d'ingresso non sono liberi.
+    """
+    cols, rows = room_tiles
+    height = len(layout)
+    width = len(layout[0])
+    rooms = {}
+    for ry in range(0, height, rows):
+        for rx in range(0, width, cols):
+            room = [row[rx:rx + cols].ljust(cols, "W") for row in layout[ry:ry + rows]]
+            room += ["W" * cols] * (rows - len(room))
+            rooms[(rx // cols, ry // rows)] = room
+    return rooms
+
+
+def start_room(rooms: dict[tuple[int, int], list[str]]) -> tuple[int, int]:
+    """
+    Restituisce le coordinate della stanza con il punto di partenza del giocatore.
+    """
+    return next(coords for coords, room in rooms.items() if any("P" in row for row in room))
+
+
+if __name__ == "__main__":
+    kind = sys.argv[1] if len(sys.argv) > 1 else "caves"
+    width, height = (int(v) for v in sys.argv[2:4]) if len(sys.argv) > 3 else (1000, 1000)
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    generator = cave_map if kind == "caves" else rooms_map
+    start = time.perf_counter()
+    layout = generator(width, height, seed)
+    elapsed = time.perf_counter() - start
+
+    free = sum(row.count(" ") for row in layout)
+    print(f"{kind} {width}x{height} (seed {seed}): {elapsed * 1000:.1f} ms, {free} free cells")
+    if width <= 120:
+        print("\n".join(layout))
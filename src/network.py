@@ -0,0 +1,811 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modalità client/server su socket locali.
+
+Il server esegue un `World` autoritativo senza finestra, a frequenza fissa
+(`SERVER_TICK_RATE`), in cui ogni client controlla un proprio giocatore con
+gli input che invia. Ad ogni tick invia ai client solo lo stato cambiato
+degli attori:
+
+  * solo gli attori che hanno segnalato un cambiamento (`World.entity_changed`)
+    vengono esaminati, e di questi vengono inviati solo i campi cambiati;
+  * le posizioni sono quantizzate al pixel (interi a 16 bit);
+  * ogni `KEYFRAME_INTERVAL` tick, e a ogni nuovo client, viene inviato
+    un keyframe con lo stato completo.
+
+Così banda e CPU del server per tick crescono con il numero di attori cambiati,
+non con il numero totale di attori. I client interpolano le posizioni tra gli
+ultimi due snapshot ricevuti.
+
+Protocollo: ogni messaggio è preceduto dalla sua lunghezza (u32).
+
+    snapshot: tipo (u8) | tick (u32) | stanza (i16, i16)
+              | n. aggiornamenti (u16) | aggiornamenti | n. rimossi (u16) | id rimossi (u32)
+    aggiornamento: id (u32) | maschera dei campi (u8) | campi presenti nella maschera
+    input: tipo (u8) | dx (i8) | dy (i8) | attacco (u8)
+"""
+
+import os
+import selectors
+import socket
+import struct
+import sys
+import time
+
+import pygame as pg
+
+from settings import *
+
+from assets import configure_mixer, load_font
+from entities import Actor, Attack, Direction, Enemy, EnemyAnimation, Entity, Player, PlayerAnimation
+from governor import FrameGovernor
+from rooms import RoomCache
+from states import State, World
+
+KEYFRAME = 1
+DELTA = 2
+INPUT = 3
+
+LENGTH = struct.Struct("<I")
+SNAPSHOT_HEADER = struct.Struct("<BIhh")
+COUNT = struct.Struct("<H")
+ENTITY_HEADER = struct.Struct("<IB")
+ENTITY_ID = struct.Struct("<I")
+INPUT_MESSAGE = struct.Struct("<Bbbb")
+
+# Campi dello stato di un attore: (nome, formato).
+# Il bit i-esimo della maschera indica la presenza dell'i-esimo campo.
+FIELDS = [
+    ("kind", struct.Struct("<B")),
+    ("x", struct.Struct("<h")),
+    ("y", struct.Struct("<h")),
+    ("facing", struct.Struct("<B")),
+    ("hp", struct.Struct("<b")),
+    ("flags", struct.Struct("<B")),
+]
+FULL_MASK = (1 << len(FIELDS)) - 1
+
+KINDS = [Player, Enemy, Attack]
+DIRECTIONS = list(Direction)
+
+MOVING = 1
+ATTACKING = 2
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def entity_state(entity: Entity) -> tuple:
+    """
+    Restituisce lo stato di `entity` da inviare ai client,
+    nello stesso ordine di `FIELDS`.
+    """
+    kind = next(i for i, cls in enumerate(KINDS) if isinstance(entity, cls))
+    x, y = entity.pos
+
+    if isinstance(entity, Actor):
+        facing = DIRECTIONS.index(Direction(entity.facing.xy))
+        flags = MOVING if entity.dir.magnitude() else 0
+        if isinstance(entity, Player) and entity.is_attacking():
+            flags |= ATTACKING
+        return kind, x, y, facing, max(entity.hp, 0), flags
+
+    facing = DIRECTIONS.index(Direction(entity.dir.xy))
+    return kind, x, y, facing, 0, 0
+
+
+def encode_entity(entity_id: int, state: tuple, mask: int) -> bytes:
+    data = [ENTITY_HEADER.pack(entity_id, mask)]
+    for i, (_, fmt) in enumerate(FIELDS):
+        if mask & (1 << i):
+            data.append(fmt.pack(state[i]))
+    return b"".join(data)
+
+
+def encode_snapshot(kind: int, tick: int, room: tuple[int, int],
+                    updates: list[bytes], removed: list[int]) -> bytes:
+    data = [SNAPSHOT_HEADER.pack(kind, tick, *room), COUNT.pack(len(updates)), *updates,
+            COUNT.pack(len(removed)), *(ENTITY_ID.pack(i) for i in removed)]
+    payload = b"".join(data)
+    return LENGTH.pack(len(payload)) + payload
+
+
+class StateEncoder:
+    """
+    Tiene traccia degli attori e di cosa è cambiato dall'ultimo snapshot.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Dopo un reset gli id ripartono da capo: i client
+        # devono ricevere un keyframe per ripartire da zero.
+        self.needs_keyframe = True
+        self._ids: dict[Entity, int] = {}
+        self._next_id = 1
+        self._sent: dict[int, tuple] = {}
+        self._changed: set[Entity] = set()
+        self._removed: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def added(self, entity: Entity):
+        if entity not in self._ids:
+            self._ids[entity] = self._next_id
+            self._next_id += 1
+        self._changed.add(entity)
+
+    def removed(self, entity: Entity):
+        entity_id = self._ids.pop(entity, None)
+        self._changed.discard(entity)
+        if self._sent.pop(entity_id, None) is not None:
+            self._removed.append(entity_id)
+
+    def changed(self, entity: Entity):
+        if entity in self._ids:
+            self._changed.add(entity)
+
+    def delta(self, tick: int, room: tuple[int, int]) -> bytes:
+        """
+        Codifica i soli campi cambiati degli attori cambiati.
+        """
+        updates = []
+        for entity in self._changed:
+            entity_id = self._ids[entity]
+            state = entity_state(entity)
+            last = self._sent.get(entity_id)
+
+            if last is None:
+                mask = FULL_MASK
+            else:
+                mask = 0
+                for i, (old, new) in enumerate(zip(last, state)):
+                    if old != new:
+                        mask |= 1 << i
+                if not mask:
+                    continue
+
+            self._sent[entity_id] = state
+            updates.append(encode_entity(entity_id, state, mask))
+
+        removed, self._removed = self._removed, []
+        self._changed.clear()
+        return encode_snapshot(DELTA, tick, room, updates, removed)
+
+    def keyframe(self, tick: int, room: tuple[int, int]) -> bytes:
+        """
+        Codifica lo stato completo, ricalcolato per tutti gli attori: corregge
+        anche i cambiamenti non segnalati con `changed`.
+        Va chiamato dopo `delta` per lo stesso tick.
+        """
+        updates = []
+        for entity, entity_id in self._ids.items():
+            state = self._sent[entity_id] = entity_state(entity)
+            updates.append(encode_entity(entity_id, state, FULL_MASK))
+        return encode_snapshot(KEYFRAME, tick, room, updates, [])
+
+
+class TrackedGroup(pg.sprite.Group):
+    """
+    Gruppo che notifica all'encoder gli attori aggiunti e rimossi.
+    """
+
+    def __init__(self, encoder: StateEncoder, *sprites):
+        self._encoder = encoder
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, *args):
+        super().add_internal(sprite, *args)
+        self._encoder.added(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._encoder.removed(sprite)
+
+
+class RemotePlayer(Player):
+    """
+    Giocatore controllato dagli input ricevuti dal server.
+    """
+
+    __slots__ = ("input_dir",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.input_dir = (0, 0)
+
+    def _update_dir(self):
+        self.dir.xy = self.input_dir
+
+
+class ServerWorld(World):
+    """
+    `World` autoritativo del server: non suona musica e
+    segnala all'encoder ogni cambiamento degli attori.
+
+    Ogni client controlla un proprio giocatore, creato con `add_player`:
+    non c'è un giocatore principale (`player` è `None`) e la partita
+    ricomincia quando muoiono tutti i giocatori.
+    """
+
+    player_type = RemotePlayer
+
+    def __init__(self, game, encoder: StateEncoder):
+        self.encoder = encoder
+        super().__init__(game)
+
+    def new_game(self):
+        self.encoder.reset()
+        super().new_game()
+
+    def _init_groups(self):
+        super()._init_groups()
+        self.actors = TrackedGroup(self.encoder)
+        self.attacks = TrackedGroup(self.encoder)
+        self.player_group = pg.sprite.Group()
+
+    def _spawn_player(self, x: float, y: float) -> None:
+        # I giocatori vengono creati solo quando si collegano i client.
+        self._spawn = x, y
+        return None
+
+    def add_player(self) -> RemotePlayer:
+        """
+        Crea il giocatore di un nuovo client, accanto agli altri giocatori
+        oppure, se non ce ne sono, nel punto di partenza.
+        """
+        players = self.player_group.sprites()
+        if players:
+            x, y = players[0].pos
+        else:
+            if self.room.coords != self.start_room:
+                self._enter_room(self.rooms.get(self.start_room))
+            x, y = self._spawn
+        return super()._spawn_player(x, y)
+
+    def remove_player(self, player: RemotePlayer):
+        """
+        Rimuove il giocatore di un client che si è disconnesso.
+        """
+        player.kill()
+
+    def game_over(self):
+        if not self.player_group:
+            super().game_over()
+
+    def _start_bg_music(self):
+        pass
+
+    def play(self):
+        pass
+
+    def pause(self):
+        pass
+
+    def entity_changed(self, entity: Entity):
+        self.encoder.changed(entity)
+
+    def update(self, dt):
+        super().update(dt)
+        # L'attacco segue il giocatore: cambia ad ogni tick in cui esiste.
+        for attack in self.attacks:
+            self.encoder.changed(attack)
+
+
+class ServerGame:
+    """
+    Sostituisce `Game` per il `World` del server.
+    """
+
+    def __init__(self, tick_rate: int):
+        self.governor = FrameGovernor(tick_rate)
+        self.clock = pg.time.Clock()
+        self.restart = False
+
+    def game_over(self):
+        # Non si può ricominciare nel mezzo di un update: lo fa il server a fine tick.
+        self.restart = True
+
+    def pause(self):
+        pass
+
+
+class ServerStats:
+
+    def __init__(self):
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.keyframe_bytes = 0
+        self.updates_sent = 0
+        self.update_time = 0.
+        self.sync_time = 0.
+
+
+class _Connection:
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbox = b""
+        self.outbox = bytearray()
+        self.needs_keyframe = True
+        self.player: RemotePlayer | None = None
+
+
+class Server:
+    """
+    Server autoritativo: accetta client su `address`
+    (coppia host/porta TCP, oppure percorso di un socket Unix).
+    """
+
+    def __init__(self, address=SERVER_ADDRESS, tick_rate: int = SERVER_TICK_RATE,
+                 keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.tick_rate = tick_rate
+        self.keyframe_interval = keyframe_interval
+        self.tick_count = 0
+        self.stats = ServerStats()
+
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(address)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self.address = self._listener.getsockname()
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._connections: list[_Connection] = []
+
+        self.encoder = StateEncoder()
+        self.game = ServerGame(tick_rate)
+        self.world = ServerWorld(self.game, self.encoder)
+
+    def close(self):
+        for conn in self._connections:
+            conn.sock.close()
+        self._selector.close()
+        self._listener.close()
+
+    def serve_forever(self):
+        interval = 1 / self.tick_rate
+        deadline = time.perf_counter()
+        while True:
+            self.tick()
+            deadline += interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Siamo in ritardo: non cerchiamo di recuperare i tick persi.
+                deadline = time.perf_counter()
+
+    def tick(self):
+        """
+        Esegue un tick: legge gli input, aggiorna il mondo e invia lo snapshot.
+        """
+        self._poll()
+
+        start = time.perf_counter()
+        self.world.update(1000 / self.tick_rate)
+        if self.game.restart:
+            self.game.restart = False
+            self.world.new_game()
+            for conn in self._connections:
+                conn.player = self.world.add_player()
+        synced = time.perf_counter()
+
+        self._broadcast()
+        end = time.perf_counter()
+
+        self.tick_count += 1
+        self.stats.ticks += 1
+        self.stats.update_time += (synced - start) * 1000
+        self.stats.sync_time += (end - synced) * 1000
+
+    def _poll(self):
+        for key, _ in self._selector.select(timeout=0):
+            if key.fileobj is self._listener:
+                self._accept()
+            else:
+                self._receive(key.data)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = _Connection(sock)
+            conn.player = self.world.add_player()
+            self._connections.append(conn)
+            self._selector.register(sock, selectors.EVENT_READ, conn)
+
+    def _disconnect(self, conn: _Connection):
+        self._selector.unregister(conn.sock)
+        conn.sock.close()
+        self._connections.remove(conn)
+        self.world.remove_player(conn.player)
+
+    def _receive(self, conn: _Connection):
+        try:
+            data = conn.sock.recv(4096)
+        except ConnectionError:
+            data = b""
+        if not data:
+            self._disconnect(conn)
+            return
+
+        conn.inbox += data
+        try:
+            # I client inviano solo input: un messaggio di lunghezza diversa è malformato.
+            messages = _split_messages(conn, INPUT_MESSAGE.size)
+            if any(len(message) != INPUT_MESSAGE.size for message in messages):
+                raise ProtocolError("Invalid input message")
+        except ProtocolError:
+            self._disconnect(conn)
+            return
+
+        for message in messages:
+            kind, dx, dy, attack = INPUT_MESSAGE.unpack(message)
+            # Un giocatore morto resta fermo fino alla prossima partita.
+            if kind != INPUT or not conn.player.alive():
+                continue
+            conn.player.input_dir = (dx, dy)
+            if attack:
+                self.world.player_start_attack(conn.player)
+
+    def _broadcast(self):
+        room = self.world.room.coords
+        delta = self.encoder.delta(self.tick_count, room)
+        keyframe = None
+        periodic = self.tick_count % self.keyframe_interval == 0 or self.encoder.needs_keyframe
+        self.encoder.needs_keyframe = False
+
+        for conn in list(self._connections):
+            if periodic or conn.needs_keyframe:
+                keyframe = keyframe or self.encoder.keyframe(self.tick_count, room)
+                message = keyframe
+                conn.needs_keyframe = False
+                self.stats.keyframe_bytes += len(message)
+            else:
+                message = delta
+
+            conn.outbox += message
+            self.stats.bytes_sent += len(message)
+            try:
+                sent = conn.sock.send(conn.outbox)
+            except BlockingIOError:
+                sent = 0
+            except ConnectionError:
+                self._disconnect(conn)
+                continue
+            del conn.outbox[:sent]
+
+
+def _split_messages(conn, max_length: int | None = None) -> list[bytes]:
+    """
+    Estrae da `conn.inbox` i messaggi completi.
+    Solleva `ProtocolError` se un messaggio supera `max_length` byte.
+    """
+    messages = []
+    inbox = conn.inbox
+    offset = 0
+    while len(inbox) - offset >= LENGTH.size:
+        (length,) = LENGTH.unpack_from(inbox, offset)
+        if max_length is not None and length > max_length:
+            raise ProtocolError(f"Message too long: {length} bytes")
+        end = offset + LENGTH.size + length
+        if end > len(inbox):
+            break
+        messages.append(inbox[offset + LENGTH.size:end])
+        offset = end
+    conn.inbox = inbox[offset:]
+    return messages
+
+
+class ReplicaEntity:
+    """
+    Copia, lato client, dello stato di un attore del server.
+    """
+
+    def __init__(self):
+        self.kind = self.x = self.y = self.facing = self.hp = self.flags = 0
+        self.prev_x = self.prev_y = 0
+
+    def position(self, alpha: float) -> tuple[float, float]:
+        """
+        Posizione interpolata tra gli ultimi due snapshot (`alpha` in [0, 1]).
+        """
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+
+class ReplicaState:
+    """
+    Stato del mondo ricostruito dal client a partire dagli snapshot.
+    """
+
+    def __init__(self):
+        self.tick = 0
+        self.room = (0, 0)
+        self.entities: dict[int, ReplicaEntity] = {}
+        self.snapshot_time = 0.
+
+    def apply(self, message: bytes):
+        kind, self.tick, *room = SNAPSHOT_HEADER.unpack_from(message)
+        room = tuple(room)
+        offset = SNAPSHOT_HEADER.size
+
+        teleport = kind == KEYFRAME or room != self.room
+        self.room = room
+        for entity in self.entities.values():
+            entity.prev_x, entity.prev_y = entity.x, entity.y
+
+        entities = {} if kind == KEYFRAME else self.entities
+        (count,) = COUNT.unpack_from(message, offset)
+        offset += COUNT.size
+        for _ in range(count):
+            entity_id, mask = ENTITY_HEADER.unpack_from(message, offset)
+            offset += ENTITY_HEADER.size
+
+            entity = self.entities.get(entity_id)
+            new = entity is None
+            if new:
+                entity = ReplicaEntity()
+            entities[entity_id] = entity
+
+            for i, (name, fmt) in enumerate(FIELDS):
+                if mask & (1 << i):
+                    (value,) = fmt.unpack_from(message, offset)
+                    offset += fmt.size
+                    setattr(entity, name, value)
+
+            if new or teleport:
+                entity.prev_x, entity.prev_y = entity.x, entity.y
+
+        (count,) = COUNT.unpack_from(message, offset)
+        offset += COUNT.size
+        for _ in range(count):
+            (entity_id,) = ENTITY_ID.unpack_from(message, offset)
+            offset += ENTITY_ID.size
+            entities.pop(entity_id, None)
+
+        self.entities = entities
+        self.snapshot_time = time.perf_counter()
+
+
+class Client:
+    """
+    Client che riceve gli snapshot dal server e gli invia gli input.
+    """
+
+    def __init__(self, address=SERVER_ADDRESS):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        else:
+            self.sock = socket.create_connection(address)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+
+        self.inbox = b""
+        self.state = ReplicaState()
+        self.bytes_received = 0
+
+    def close(self):
+        self.sock.close()
+
+    def send_input(self, dx: int, dy: int, attack: bool = False):
+        payload = INPUT_MESSAGE.pack(INPUT, dx, dy, attack)
+        self.sock.sendall(LENGTH.pack(len(payload)) + payload)
+
+    def poll(self) -> int:
+        """
+        Legge e applica gli snapshot arrivati. Restituisce quanti ne ha applicati.
+        """
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                raise ConnectionError("Server disconnected")
+            self.bytes_received += len(data)
+            self.inbox += data
+
+        messages = _split_messages(self)
+        for message in messages:
+            self.state.apply(message)
+        return len(messages)
+
+
+class ReplicaSprite(Entity):
+    """
+    Sprite che disegna un attore replicato.
+    """
+
+    __slots__ = ("replica", "dir", "facing", "_attacking", "_animation")
+
+    def __init__(self, replica: ReplicaEntity, *groups):
+        super().__init__(*groups)
+        self.replica = replica
+        self.dir = pg.Vector2()
+        self.facing = pg.Vector2(0, 1)
+        self._attacking = False
+
+        kind = KINDS[replica.kind]
+        if kind is Attack:
+            self._animation = None
+        else:
+            self._animation = (PlayerAnimation if kind is Player else EnemyAnimation)(self)
+        self.rect = self.image.get_rect()
+
+    @property
+    def image(self) -> pg.Surface:
+        if self._animation is None:
+            return Attack.get_surfaces()[DIRECTIONS[self.replica.facing]]
+        return self._animation.get_curr_image()
+
+    def update(self, dt, alpha: float):
+        replica = self.replica
+        self.facing.xy = DIRECTIONS[replica.facing].value
+        self.dir.xy = self.facing if replica.flags & MOVING else (0, 0)
+        self.rect = self.image.get_rect()
+
+        self.rect.midbottom = replica.position(alpha)
+        if self._animation is not None:
+            self._update_animation(dt)
+
+    def _update_animation(self, dt):
+        attacking = bool(self.replica.flags & ATTACKING)
+        if attacking != self._attacking:
+            self._attacking = attacking
+            if attacking:
+                self._animation.attack_animation()
+            else:
+                self._animation.end_attack_animation()
+        self._animation.update(dt)
+
+
+class RemoteView(State):
+    """
+    Stato di gioco del client: invia gli input al server
+    e disegna lo stato ricevuto.
+    """
+
+    def __init__(self, game, client: Client):
+        super().__init__(game)
+        self.client = client
+        self.rooms = RoomCache(World.overworld.get)
+        self.sprites: dict[int, ReplicaSprite] = {}
+        self.visible_entities = pg.sprite.Group()
+        self.room = None
+        self._attack = False
+
+    def process_event(self, event: pg.event.Event, dt: int):
+        if event.type == pg.KEYDOWN:
+            if event.key == pg.K_ESCAPE:
+                # In pausa non si inviano input: il server terrebbe l'ultimo
+                # ricevuto e il giocatore continuerebbe a camminare.
+                if self._send_input(0, 0):
+                    self.game.pause()
+            elif event.key == pg.K_SPACE:
+                self._attack = True
+
+    def play(self):
+        pass
+
+    def _send_input(self, dx: int, dy: int, attack: bool = False) -> bool:
+        """
+        Invia un input al server. `False` se il server si è disconnesso.
+        """
+        try:
+            self.client.send_input(dx, dy, attack)
+        except OSError:
+            self._disconnect()
+            return False
+        return True
+
+    def _disconnect(self):
+        self.client.close()
+        self.game.active_state = Disconnected(self.game)
+
+    def update(self, dt):
+        keys = pg.key.get_pressed()
+        dx = keys[pg.K_RIGHT] - keys[pg.K_LEFT]
+        dy = keys[pg.K_DOWN] - keys[pg.K_UP]
+        if not self._send_input(dx, dy, self._attack):
+            return
+        self._attack = False
+
+        try:
+            self.client.poll()
+        except ConnectionError:
+            self._disconnect()
+            return
+        self.rooms.step(ROOM_BUILD_BUDGET)
+
+        state = self.client.state
+        entities = state.entities
+        for entity_id in list(self.sprites):
+            if entities.get(entity_id) is not self.sprites[entity_id].replica:
+                self.sprites.pop(entity_id).kill()
+        for entity_id, replica in entities.items():
+            if entity_id not in self.sprites:
+                self.sprites[entity_id] = ReplicaSprite(replica, self.visible_entities)
+
+        # Interpolo tra gli ultimi due snapshot, in ritardo di un tick sul server.
+        elapsed = time.perf_counter() - state.snapshot_time
+        alpha = min(elapsed * SERVER_TICK_RATE, 1.)
+        for sprite in self.sprites.values():
+            sprite.update(dt, alpha)
+
+    def draw(self):
+        coords = self.client.state.room
+        if self.room is None or self.room.coords != coords:
+            self.room = self.rooms.get(coords)
+            self.rooms.prefetch(self.rooms.neighbours(coords))
+
+        self.screen.blit(self.room.background, (0, 0))
+        entities = self.room.walls + self.visible_entities.sprites()
+        for ent in sorted(entities, key=lambda e: e.pos[1]):
+            ent.draw(self.screen)
+
+
+class Disconnected(State):
+    """
+    Schermata mostrata dal client quando il server si disconnette.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.screen.fill(RED)
+
+        # Inizializza font.
+        big_font = load_font(FONTS / "NormalFont.ttf", 24)
+        small_font = load_font(FONTS / "NormalFont.ttf", 16)
+
+        # Crea `Surface` con scritta.
+        bf_surf = big_font.render("DISCONNESSO", False, "white")
+        sf_surf = small_font.render("ESC: ESCI", False, "white")
+
+        # Creo `Rect` per la posizione.
+        x, y = VIEW_RES
+        center_x, center_y = x / 2, y / 2
+        bf_rect = bf_surf.get_rect(midbottom=(center_x, center_y))
+        sf_rect = sf_surf.get_rect(midbottom=(center_x, y - 20))
+
+        # Disegno le surface su `self.screen`
+        self.screen.blit(bf_surf, bf_rect)
+        self.screen.blit(sf_surf, sf_rect)
+
+    def process_event(self, event: pg.event.Event, dt: int):
+        if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
+            sys.exit()
+
+
+def run_server(address=SERVER_ADDRESS):
+    """
+    Avvia un server senza finestra.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    configure_mixer()
+    pg.init()
+    # Serve una modalità video per convertire le immagini caricate.
+    pg.display.set_mode((1, 1))
+
+    server = Server(address)
+    print(f"Server listening on {server.address}")
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
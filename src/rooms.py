@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stanze dell'overworld e loro cache.
+
+Come in *The Legend of Zelda*, il mondo è una griglia di stanze grandi quanto
+lo schermo. Costruire una stanza (sfondo, muri, dati di collisione e spawn)
+richiede diverse centinaia di `blit`, per cui le stanze adiacenti a quella
+corrente vengono costruite in anticipo, un pezzo per frame, sfruttando il
+tempo avanzato dal frame. Le stanze costruite restano in una cache LRU di
+dimensione limitata, così che la memoria non cresca con la dimensione
+dell'overworld.
+"""
+
+import random
+import time
+
+from typing import Callable, Iterator, Optional
+
+import pygame as pg
+
+from settings import *
+
+from assets import Tileset
+from entities import Direction, Wall
+from sight import LineOfSight
+
+Coords = tuple[int, int]
+Layout = list[str]
+
+
+def is_free(layout: Layout, rect: pg.Rect) -> bool:
+    """
+    `True` se nessuno dei tile di `layout` coperti da `rect` è un muro.
+    """
+    rows = range(max(rect.top, 0) // TILESIZE, min(rect.bottom - 1, len(layout) * TILESIZE - 1) // TILESIZE + 1)
+    cols = range(max(rect.left, 0) // TILESIZE, min(rect.right - 1, len(layout[0]) * TILESIZE - 1) // TILESIZE + 1)
+    return all(layout[row][col] != "W" for row in rows for col in cols)
+
+
+def entry_tiles(layout: Layout, direction: Direction) -> list[Coords]:
+    """
+    Restituisce i tile liberi (colonna, riga) del bordo da cui
+    si entra nella stanza muovendosi in direzione `direction`.
+    """
+    rows, cols = len(layout), len(layout[0])
+    if direction is Direction.RIGHT:
+        edge = [(0, row) for row in range(rows)]
+    elif direction is Direction.LEFT:
+        edge = [(cols - 1, row) for row in range(rows)]
+    elif direction is Direction.DOWN:
+        edge = [(col, 0) for col in range(cols)]
+    else:
+        edge = [(col, rows - 1) for col in range(cols)]
+    return [(col, row) for col, row in edge if layout[row][col] != "W"]
+
+
+class Room:
+    """
+    Stanza dell'overworld, costruita a partire dal suo layout.
+
+    Il layout usa la stessa grammatica di `World.world_map`:
+      * `W`: muro;
+      * `P`: punto di partenza del giocatore;
+      * `E`: nemico;
+      * ` `: spazio libero.
+    """
+
+    def __init__(self, coords: Coords, layout: Layout):
+        self.coords = coords
+        self.layout = layout
+        self.ready = False
+
+        self.background = pg.Surface(VIEW_RES)
+        self.static_layer: pg.Surface | None = None
+        self.walls: list[Wall] = []
+        # Dati di collisione: `True` dove c'è un muro.
+        self.solid: list[list[bool]] = []
+        self.sight: LineOfSight | None = None
+        self.player_spawns: list[tuple[float, float]] = []
+        self.enemy_spawns: list[tuple[float, float]] = []
+
+    def build(self, grass_tiles: list[pg.Surface]) -> Iterator[None]:
+        """
+        Costruisce la stanza una riga alla volta:
+        ad ogni `yield` il lavoro può essere interrotto e ripreso.
+        """
+        for row_index, row in enumerate(self.layout):
+            self.solid.append([col == "W" for col in row])
+
+            for col_index, col in enumerate(row):
+                x = col_index * TILESIZE
+                y = row_index * TILESIZE
+
+                self.background.blit(random.choice(grass_tiles), (x, y))
+                if col == "W":
+                    self.walls.append(Wall(x, y))
+                    continue
+
+                x += HALF_TILESIZE
+                y += HALF_TILESIZE
+
+                if col == "P":
+                    self.player_spawns.append((x, y))
+                elif col == "E":
+                    self.enemy_spawns.append((x, y))
+            yield
+
+        # Sfondo e muri non cambiano mai: li componiamo in un unico livello
+        # statico, usato per il ridisegno con i dirty rect.
+        self.static_layer = self.background.copy()
+        for wall in self.walls:
+            wall.draw(self.static_layer)
+        self.sight = LineOfSight(self.solid)
+        self.ready = True
+
+
+class RoomCache:
+    """
+    Cache LRU delle stanze costruite.
+
+    `layouts` è una funzione che, date le coordinate di una stanza,
+    ne restituisce il layout, oppure `None` se la stanza non esiste.
+    """
+
+    def __init__(self, layouts: Callable[[Coords], Optional[Layout]], capacity: int = ROOM_CACHE_SIZE):
+        self._layouts = layouts
+        self.capacity = capacity
+        self._rooms: dict[Coords, Room] = {}
+        self._pending: dict[Coords, Iterator[None]] = {}
+        self._grass_tiles = Tileset(IMAGES / "grass_tileset.png", TILESIZE).images_at_row(0)
+
+    def __contains__(self, coords: Coords) -> bool:
+        return coords in self._rooms
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def exists(self, coords: Coords) -> bool:
+        return coords in self._rooms or self._layouts(coords) is not None
+
+    def layout(self, coords: Coords) -> Optional[Layout]:
+        """
+        Restituisce il layout della stanza `coords`, anche se non
+        è ancora stata costruita, oppure `None` se non esiste.
+        """
+        room = self._rooms.get(coords)
+        return room.layout if room is not None else self._layouts(coords)
+
+    def get(self, coords: Coords) -> Room:
+        """
+        Restituisce la stanza `coords`, segnandola come la più recente.
+        Se non è ancora pronta, ne completa la costruzione.
+        """
+        room = self._rooms.pop(coords, None) or self._new_room(coords)
+        self._rooms[coords] = room
+
+        pending = self._pending.pop(coords, None)
+        if pending is not None:
+            for _ in pending:
+                pass
+        return room
+
+    def prefetch(self, coords_list: list[Coords]):
+        """
+        Mette in coda la costruzione delle stanze in `coords_list`
+        che esistono e che non sono già in cache.
+        """
+        for coords in coords_list:
+            if coords not in self._rooms and self._layouts(coords) is not None:
+                self._new_room(coords)
+
+    def step(self, budget: float):
+        """
+        Avanza la costruzione delle stanze in coda per al più
+        `budget` millisecondi.
+        """
+        deadline = time.perf_counter() + budget / 1000
+        while self._pending and time.perf_counter() < deadline:
+            coords, builder = next(iter(self._pending.items()))
+            if next(builder, StopIteration) is StopIteration:
+                del self._pending[coords]
+
+    def neighbours(self, coords: Coords) -> list[Coords]:
+        x, y = coords
+        return [(x + dx, y + dy) for dx, dy in (d.value for d in Direction)]
+
+    def _new_room(self, coords: Coords) -> Room:
+        room = Room(coords, self._layouts(coords))
+        self._rooms[coords] = room
+        self._pending[coords] = room.build(self._grass_tiles)
+        self._evict()
+        return room
+
+    def _evict(self):
+        while len(self._rooms) > self.capacity:
+            # Il primo elemento è quello usato meno di recente.
+            coords = next(iter(self._rooms))
+            del self._rooms[coords]
+            self._pending.pop(coords, None)
@@ -17,6 +17,10 @@ IMAGES = ASSETS / "img"
 SOUNDS = ASSETS / "sound"
 FONTS = ASSETS / "font"
 
+# Pacchetto con gli assets pre-decodificati (vedi `assetpack.py`).
+# Se il file non esiste, gli assets vengono caricati dai singoli file.
+ASSET_PACK = SRC / "assets.pack"
+
 # Schermo e finestra.
 TITLE = "Game development con Pygame"
 FPS = 60
@@ -30,6 +34,16 @@ HALF_TILESIZE = TILESIZE / 2
 VIEW_RES = (SCREEN_TILES[0] * TILESIZE,
             SCREEN_TILES[1] * TILESIZE)
 
+# Overworld: numero massimo di stanze tenute in memoria e millisecondi
+# per frame dedicati alla costruzione in anticipo delle stanze adiacenti.
+ROOM_CACHE_SIZE = 16
+ROOM_BUILD_BUDGET = 2
+
+# Modalità client/server (vedi `network.py`).
+SERVER_ADDRESS = ("127.0.0.1", 5454)
+SERVER_TICK_RATE = 30
+KEYFRAME_INTERVAL = 60
+
 # Colori
 BLUE = (0, 173, 233)
 YELLOW = (252, 182, 71)
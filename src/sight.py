@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linea di vista sulla griglia dei tile.
+
+Invece di lanciare un raggio contro gli sprite dei muri, si percorrono i tile
+tra due punti con l'algoritmo di Bresenham. I muri di una stanza non cambiano,
+per cui il risultato per una coppia di tile vale per sempre e viene tenuto in
+cache: finché nemico e giocatore restano nei loro tile non si ricalcola nulla.
+
+Le stanze restano in memoria (vedi `RoomCache`) e nemici e giocatori
+attraversano col tempo tante coppie di tile diverse: la cache viene svuotata
+quando raggiunge `CACHE_SIZE` voci. Le coppie in uso in un frame sono poche
+(nemici × giocatori), per cui vengono ricalcolate subito dopo.
+"""
+
+from typing import Iterable
+
+from settings import *
+
+Tile = tuple[int, int]
+
+CACHE_SIZE = 1024
+
+
+def tile_at(pos: tuple[float, float]) -> Tile:
+    """
+    Restituisce il tile che contiene il punto `pos`.
+    """
+    x, y = pos
+    return int(x // TILESIZE), int(y // TILESIZE)
+
+
+class LineOfSight:
+    """
+    Risponde alle domande di linea di vista su una griglia di collisione,
+    dove `solid[riga][colonna]` è `True` se il tile blocca la vista.
+    """
+
+    def __init__(self, solid: list[list[bool]], cache_size: int = CACHE_SIZE):
+        self._solid = solid
+        self._rows = len(solid)
+        self._cols = len(solid[0]) if solid else 0
+        self._cache: dict[tuple[Tile, Tile], bool] = {}
+        self._cache_size = cache_size
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _is_solid(self, col: int, row: int) -> bool:
+        # Fuori dalla griglia la vista è libera: le stanze confinano con altre stanze.
+        return 0 <= row < self._rows and 0 <= col < self._cols and self._solid[row][col]
+
+    def _walk(self, source: Tile, target: Tile) -> bool:
+        """
+        Percorre i tile da `source` a `target` (esclusi) con Bresenham.
+        `False` appena incontra un tile solido.
+        """
+        x, y = source
+        x1, y1 = target
+        dx, dy = abs(x1 - x), -abs(y1 - y)
+        sx = 1 if x < x1 else -1
+        sy = 1 if y < y1 else -1
+        err = dx + dy
+
+        while True:
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x += sx
+            if e2 <= dx:
+                err += dx
+                y += sy
+            if (x, y) == (x1, y1):
+                return True
+            if self._is_solid(x, y):
+                return False
+
+    def visible(self, source: Tile, target: Tile) -> bool:
+        """
+        `True` se da `source` si vede `target`.
+        """
+        if source == target:
+            return True
+
+        key = (source, target)
+        visible = self._cache.get(key)
+        if visible is None:
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            visible = self._cache[key] = self._walk(source, target)
+        return visible
+
+    def batch(self, sources: Iterable[Tile], target: Tile) -> list[bool]:
+        """
+        Come `visible`, ma per tanti `sources` verso lo stesso `target`.
+        """
+        cache = self._cache
+        result = []
+        for source in sources:
+            visible = cache.get((source, target))
+            if visible is None:
+                visible = self.visible(source, target)
+            result.append(visible)
+        return result
@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import random
-
 import pygame as pg
 
 from settings import *
 
-from assets import Tileset
-from entities import Entity, Player, Enemy, Wall, Attack
+from assets import load_font, load_music, load_sound
+from blitaudit import AUDITOR
+from entities import Direction, Entity, Player, Enemy, Attack
+from governor import Quality
+from hud import world_hud
+from rooms import Room, RoomCache, entry_tiles, is_free
+from sight import tile_at
 
 
 class State:
@@ -50,24 +53,71 @@ class World(State):
                  "WWWWWWW  WWWWWWW",
                  "WWWWWWW  WWWWWWW"]
 
-    def __init__(self, *args, **kwargs):
+    # Overworld: { coordinate della stanza : layout }.
+    overworld = {
+        (0, 0): world_map,
+        (-1, 0): ["WWWWWWWWWWWWWWWW",
+                  "W   WWWWWWWW   W",
+                  "W      WW      W",
+                  "W  E        E  W",
+                  "W     W  W      ",
+                  "W               ",
+                  "W     W  W      ",
+                  "W              W",
+                  "W   E      W   W",
+                  "WW    WWWW    WW",
+                  "WWWWWWWWWWWWWWWW"],
+        (1, 0): ["WWWWWWWWWWWWWWWW",
+                 "WWW          WWW",
+                 "W    W    W    W",
+                 "W      E       W",
+                 "     WW   WW   W",
+                 "               W",
+                 "     WW   WW   W",
+                 "W        E     W",
+                 "W    W    W    W",
+                 "WWW          WWW",
+                 "WWWWWWWWWWWWWWWW"],
+        (0, 1): ["WWWWWWW  WWWWWWW",
+                 "WWWWWW    WWWWWW",
+                 "WW            WW",
+                 "W   E    W     W",
+                 "W      W   E   W",
+                 "W  W           W",
+                 "W        W  W  W",
+                 "W   E          W",
+                 "WW     W      WW",
+                 "WWWW        WWWW",
+                 "WWWWWWWWWWWWWWWW"],
+    }
+    start_room = (0, 0)
+    player_type = Player
+
+    def __init__(self, *args, overworld: dict[tuple[int, int], list[str]] | None = None,
+                 start_room: tuple[int, int] = None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Overworld alternativo, ad esempio generato con `mapgen.py`.
+        if overworld is not None:
+            self.overworld = overworld
+            self.start_room = start_room
         self._init_sounds()
+        self.hud = world_hud(self)
         self.new_game()
 
     def _init_sounds(self):
-        self._attack_sound = pg.mixer.Sound(SOUNDS / "Attack.wav")
-        self._enemy_hit_sound = pg.mixer.Sound(SOUNDS / "EnemyHit.wav")
-        self._player_hit_sound = pg.mixer.Sound(SOUNDS / "PlayerHit.wav")
-        self._game_over_sound = pg.mixer.Sound(SOUNDS / "GameOver.wav")
+        self._attack_sound = load_sound(SOUNDS / "Attack.wav")
+        self._enemy_hit_sound = load_sound(SOUNDS / "EnemyHit.wav")
+        self._player_hit_sound = load_sound(SOUNDS / "PlayerHit.wav")
+        self._game_over_sound = load_sound(SOUNDS / "GameOver.wav")
 
     def new_game(self):
         self._init_groups()
         self._init_world()
+        self.elapsed = 0
         self._start_bg_music()
 
     def _start_bg_music(self):
-        pg.mixer.music.load(SOUNDS / "theme.ogg")
+        load_music(SOUNDS / "theme.ogg")
         pg.mixer.music.set_volume(.4)
         pg.mixer.music.play(loops=-1)
 
@@ -81,39 +131,104 @@ class World(State):
 
     def _init_world(self):
         """
-        Crea la mappa del mondo.
+        Crea la mappa del mondo, partendo dalla stanza iniziale.
         """
-        # Creiamo le surface per lo sfondo.
-        grass_tiles = Tileset(IMAGES / "grass_tileset.png", TILESIZE).images_at_row(0)
+        self.rooms = RoomCache(self.overworld.get)
+        self.room = self.rooms.get(self.start_room)
+
+        players = len(self.room.player_spawns)
+        if players != 1:
+            raise Exception(f"Invalid number of players: {players}")
 
-        world_x = SCREEN_TILES[0] * TILESIZE
-        world_y = SCREEN_TILES[1] * TILESIZE
-        self.world = pg.Surface((world_x, world_y))
-        self.background = pg.Surface((world_x, world_y))
+        x, y = self.room.player_spawns[0]
+        self.player = self._spawn_player(x, y)
+        # Direzione del cambio di stanza richiesto e giocatore che lo ha causato.
+        self._next_room: tuple[Direction, Player] | None = None
+        self._enter_room(self.room)
 
-        players = 0
-        for row_index, row in enumerate(self.world_map):
-            for col_index, col in enumerate(row):
-                x = col_index * TILESIZE
-                y = row_index * TILESIZE
+    def _spawn_player(self, x: float, y: float) -> Player:
+        return self.player_type(x, y, [self.environment], self,
+                                self.player_group, self.actors, self.visible_entities)
 
-                self.background.blit(random.choice(grass_tiles), (x, y))
-                if col == "W":
-                    Wall(x, y, self.environment, self.visible_entities)
-                    continue
+    def _enter_room(self, room: Room):
+        """
+        Rende `room` la stanza corrente: ne carica muri e nemici
+        e mette in coda la costruzione delle stanze adiacenti.
+        """
+        for entity in self.visible_entities:
+            if not isinstance(entity, Player):
+                entity.kill()
 
-                x += HALF_TILESIZE
-                y += HALF_TILESIZE
+        self.room = room
+        self.background = room.background
+        self.static_layer = room.static_layer
+        for wall in room.walls:
+            wall.add(self.environment, self.visible_entities)
 
-                if col == "P":
-                    players += 1
-                    self.player = Player(x, y, [self.environment], self,
-                                         self.player_group, self.actors, self.visible_entities)
-                elif col == "E":
-                    Enemy(x, y, [self.environment], self, self.enemies, self.actors, self.visible_entities)
+        for x, y in room.enemy_spawns:
+            Enemy(x, y, [self.environment], self, self.enemies, self.actors, self.visible_entities)
 
-        if players != 1:
-            raise Exception(f"Invalid number of players: {players}")
+        self.rooms.prefetch(self.rooms.neighbours(room.coords))
+        self._targets: dict[Enemy, Player] = {}
+        self._dirty_rects: list[pg.Rect] | None = None
+
+    def entity_changed(self, entity: Entity):
+        """
+        Chiamato dagli `Actor` quando cambia il loro stato visibile
+        (posizione, direzione, punti vita, attacco).
+        """
+        pass
+
+    def change_room(self, direction: Direction, player: Player) -> bool:
+        """
+        Richiede il passaggio alla stanza adiacente nella direzione `direction`,
+        attraversata da `player`. Il cambio avviene a fine update.
+        `False` se la stanza non esiste o se nel punto in cui `player`
+        entrerebbe c'è un muro (es. sul confine tra stanze generate con
+        `mapgen.split_rooms`): in quel caso il bordo resta invalicabile.
+        """
+        x, y = self.room.coords
+        dx, dy = direction.value
+        layout = self.rooms.layout((x + dx, y + dy))
+        if layout is None or not is_free(layout, player.entry_hitbox(direction)):
+            return False
+
+        self._next_room = direction, player
+        return True
+
+    def _apply_room_change(self):
+        """
+        Passa alla stanza richiesta con `change_room`: il giocatore che
+        l'ha causata entra dal bordo opposto, gli altri giocatori vengono
+        messi accanto a lui, sui tile liberi più vicini dello stesso bordo.
+        """
+        (direction, leader), self._next_room = self._next_room, None
+        x, y = self.room.coords
+        dx, dy = direction.value
+        coords = x + dx, y + dy
+
+        for player in self.player_group:
+            if player.is_attacking():
+                player.end_attack()
+
+        leader.enter_from(direction)
+        others = [player for player in self.player_group if player is not leader]
+        if others:
+            col, row = tile_at(leader.hitbox.center)
+            tiles = [tile for tile in entry_tiles(self.rooms.layout(coords), direction) if tile != (col, row)]
+            tiles.sort(key=lambda tile: abs(tile[0] - col) + abs(tile[1] - row))
+            for i, player in enumerate(others):
+                if i < len(tiles):
+                    tile_x, tile_y = tiles[i]
+                    player.place_at((tile_x * TILESIZE + HALF_TILESIZE, tile_y * TILESIZE + HALF_TILESIZE))
+                else:
+                    player.place_at(leader.hitbox.center)
+
+        self._enter_room(self.rooms.get(coords))
+
+    @property
+    def quality(self) -> Quality:
+        return self.game.governor.quality
 
     def process_event(self, event: pg.event.Event, dt: int):
         if event.type == pg.KEYDOWN:
@@ -122,11 +237,11 @@ class World(State):
             elif event.key == pg.K_SPACE:
                 self.player_start_attack()
 
-    def player_start_attack(self):
+    def player_start_attack(self, player: Player | None = None):
+        player = player or self.player
         self._attack_sound.play()
-        attack = self.player.attack()
-        self.attacks.add(attack)
-        self.visible_entities.add(attack)
+        attack = player.attack()
+        attack.add(self.attacks, self.visible_entities)
 
     def pause(self):
         pg.mixer.music.stop()
@@ -139,18 +254,25 @@ class World(State):
         """
         Applica le logiche per aggiornare lo stato.
         """
+        self.elapsed += dt
+        self._update_sight()
+
         # Chiamo la `update()` di tutti gli `Actor` nel gruppo `self.actors`
         self.actors.update(dt)
 
-        for enemy in self.enemies:
-            if self.player.collide(enemy):
-                assert isinstance(enemy, Enemy)
-                if enemy.damage_player():
-                    self._player_hit_sound.play()
+        if self._next_room is not None:
+            self._apply_room_change()
+
+        for player in self.player_group:
+            for enemy in self.enemies:
+                if player.collide(enemy):
+                    assert isinstance(enemy, Enemy)
+                    if enemy.damage_player(player):
+                        self._player_hit_sound.play()
 
-        if self.player.is_attacking():
+        if self.attacks:
             self.attacks.update()
-            attacked_enemies = pg.sprite.groupcollide(self.attacks, self.enemies, False, False)
+            attacked_enemies = self._attacked_enemies()
 
             for attack, enemies in attacked_enemies.items():
                 assert isinstance(attack, Attack) and isinstance(enemies, list)
@@ -160,15 +282,104 @@ class World(State):
             if attacked_enemies:
                 self._enemy_hit_sound.play()
 
+        # Le stanze adiacenti vengono costruite col tempo avanzato dal frame.
+        self.rooms.step(ROOM_BUILD_BUDGET)
+
+    def _update_sight(self):
+        """
+        Calcola, in un colpo solo per ogni giocatore, quali nemici lo vedono.
+        Ogni nemico punta il giocatore visibile più vicino.
+        """
+        enemies = self.enemies.sprites()
+        tiles = [tile_at(enemy.hitbox.center) for enemy in enemies]
+        targets = {}
+        for player in self.player_group:
+            visible = self.room.sight.batch(tiles, tile_at(player.hitbox.center))
+            for enemy, v in zip(enemies, visible):
+                if not v:
+                    continue
+                target = targets.get(enemy)
+                if target is None or (pg.Vector2(enemy.pos).distance_squared_to(player.pos)
+                                      < pg.Vector2(enemy.pos).distance_squared_to(target.pos)):
+                    targets[enemy] = player
+        self._targets = targets
+
+    def target_of(self, enemy: Enemy) -> Player | None:
+        """
+        Il giocatore più vicino visto da `enemy` (nessun muro
+        si frappone tra i due), oppure `None`.
+        """
+        return self._targets.get(enemy)
+
+    def _attacked_enemies(self) -> dict[Attack, list[Enemy]]:
+        """
+        Restituisce i nemici colpiti da ogni attacco.
+
+        I `rect` filtrano le coppie candidate (con un unico `collidelistall`
+        per attacco), poi le maschere dei pixel confermano la collisione.
+        """
+        enemies = self.enemies.sprites()
+        rects = [enemy.rect for enemy in enemies]
+
+        attacked_enemies = {}
+        for attack in self.attacks:
+            assert isinstance(attack, Attack)
+            hit = [enemies[i] for i in attack.rect.collidelistall(rects) if attack.collide_pixels(enemies[i])]
+            if hit:
+                attacked_enemies[attack] = hit
+        return attacked_enemies
+
     def draw(self):
         """
         Disegna a schermo (renderizza) l'attuale stato di gioco.
         """
+        self.hud.update()
+        if AUDITOR.enabled:
+            AUDITOR.check(self.background, self.screen, "World.background")
+            AUDITOR.check(self.static_layer, self.screen, "World.static_layer")
+            # L'HUD non viene controllato: usa di proposito un colorkey senza RLE (vedi `Hud`).
+
+        if self.quality.full_redraw:
+            self._draw_full()
+        else:
+            self._draw_dirty()
+
+    def _draw_full(self):
+        """
+        Ridisegna tutto, ordinando le entità per profondità.
+        """
         self.screen.blit(self.background, (0, 0))
         for ent in sorted(self.visible_entities, key=lambda e: e.pos[1]):
             assert isinstance(ent, Entity)
             ent.draw(self.screen)
 
+        self.hud.draw(self.screen)
+        self._dirty_rects = None
+
+    def _draw_dirty(self):
+        """
+        Ridisegna solo le aree cambiate dal frame precedente.
+
+        I muri fanno parte del livello statico, per cui gli attori vengono
+        sempre disegnati sopra di essi, anche quando ci passano dietro.
+        """
+        if self._dirty_rects is None:
+            self.screen.blit(self.static_layer, (0, 0))
+        else:
+            for rect in self._dirty_rects:
+                self.screen.blit(self.static_layer, rect, rect)
+
+        dynamic = self.actors.sprites() + self.attacks.sprites()
+        rects = []
+        for ent in sorted(dynamic, key=lambda e: e.pos[1]):
+            assert isinstance(ent, Entity)
+            ent.draw(self.screen)
+            rects.append(ent.rect.copy())
+
+        hud_rects = [widget.rect for widget in self.hud.widgets]
+        self.hud.draw(self.screen, hud_rects)
+        self._dirty_rects = rects + hud_rects
+
     def game_over(self):
         pg.mixer.music.stop()
         self._game_over_sound.play()
@@ -182,8 +393,8 @@ class Pause(State):
         self.screen.fill(BLUE)
 
         # Inizializza font.
-        big_font = pg.font.Font(FONTS / "NormalFont.ttf", 50)
-        small_font = pg.font.Font(FONTS / "NormalFont.ttf", 18)
+        big_font = load_font(FONTS / "NormalFont.ttf", 50)
+        small_font = load_font(FONTS / "NormalFont.ttf", 18)
 
         # Crea `Surface` con scritta.
         bf_surf = big_font.render("PAUSA", False, YELLOW)
@@ -211,8 +422,8 @@ class GameOver(State):
         self.screen.fill(RED)
 
         # Inizializza font.
-        big_font = pg.font.Font(FONTS / "NormalFont.ttf", 30)
-        small_font = pg.font.Font(FONTS / "NormalFont.ttf", 16)
+        big_font = load_font(FONTS / "NormalFont.ttf", 30)
+        small_font = load_font(FONTS / "NormalFont.ttf", 16)
 
         # Crea `Surface` con scritta.
         bf_surf = big_font.render("GAME OVER", False, "white")
@@ -0,0 +1,39 @@
+import os
+import sys
+import pathlib
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# I moduli del gioco si importano tra loro come moduli di primo livello.
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
+
+import pygame as pg  # noqa: E402
+import pytest  # noqa: E402
+
+from governor import FrameGovernor  # noqa: E402
+
+
+class StubGame:
+    """
+    Sostituisce `Game`: il `World` ne usa solo governatore e clock.
+    """
+
+    def __init__(self):
+        self.governor = FrameGovernor()
+        self.clock = pg.time.Clock()
+        self.over = False
+
+    def game_over(self):
+        self.over = True
+
+    def pause(self):
+        pass
+
+
+@pytest.fixture
+def game():
+    pg.init()
+    # Serve una modalità video per convertire le immagini caricate.
+    pg.display.set_mode((1, 1))
+    return StubGame()
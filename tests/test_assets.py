@@ -0,0 +1,72 @@
+import io
+import shutil
+
+import pygame as pg
+import pytest
+
+import assets
+from assetpack import AssetPack, AssetPackError, build_pack
+from settings import ASSETS
+
+SOUND = "sound/Attack.wav"
+MUSIC = "sound/theme.ogg"
+
+
+@pytest.fixture
+def root(tmp_path):
+    """
+    Cartella di assets ridotta, con un suono e la musica.
+    """
+    root = tmp_path / "assets"
+    for name in (SOUND, MUSIC):
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(ASSETS / name, root / name)
+    return root
+
+
+@pytest.fixture
+def pack(root, tmp_path):
+    pg.mixer.quit()
+    pg.mixer.init(44100, -16, 2)
+    build_pack(tmp_path / "assets.pack", root)
+    yield AssetPack(tmp_path / "assets.pack")
+    pg.mixer.quit()
+
+
+def reopen_mixer(*args, **kwargs):
+    pg.mixer.quit()
+    pg.mixer.pre_init(*args, **kwargs)
+    pg.mixer.init()
+
+
+def test_file_reads_original_bytes(pack, root):
+    data = (root / MUSIC).read_bytes()
+    f = pack.file(MUSIC)
+    assert f.read() == data
+    f.seek(-10, io.SEEK_END)
+    assert f.read() == data[-10:]
+    f.seek(100)
+    assert f.read(4) == data[100:104]
+
+
+def test_sound_needs_packed_mixer(pack):
+    assert pack.mixer == (44100, -16, 2)
+    reopen_mixer(22050, -16, 1, allowedchanges=0)
+    with pytest.raises(AssetPackError):
+        pack.sound(SOUND)
+
+    reopen_mixer(*pack.mixer, allowedchanges=0)
+    assert pack.sound(SOUND).get_length() > 0
+
+
+def test_load_sound_falls_back_to_loose_file(pack, root, monkeypatch):
+    monkeypatch.setattr(assets, "ASSETS", root)
+    monkeypatch.setattr(assets, "_pack", pack)
+    reopen_mixer(22050, -16, 1, allowedchanges=0)
+
+    assert assets.load_sound(root / SOUND).get_length() > 0
+
+    # Senza il file sciolto l'errore del mixer non può essere nascosto.
+    (root / SOUND).unlink()
+    with pytest.raises(AssetPackError):
+        assets.load_sound(root / SOUND)
@@ -0,0 +1,61 @@
+from collections import deque
+
+import pytest
+
+from mapgen import cave_map, rooms_map, split_rooms, start_room
+
+GENERATORS = [cave_map, rooms_map]
+SIZES = [(40, 30), (120, 70)]
+SEEDS = [0, 1, 7]
+
+
+def reachable(layout: list[str], start: tuple[int, int]) -> set[tuple[int, int]]:
+    """
+    Celle non `W` raggiungibili da `start`, con una visita in ampiezza.
+    """
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (nx, ny) not in seen and 0 <= ny < len(layout) and 0 <= nx < len(layout[ny]) \
+                    and layout[ny][nx] != "W":
+                seen.add((nx, ny))
+                queue.append((nx, ny))
+    return seen
+
+
+@pytest.mark.parametrize("generate", GENERATORS)
+@pytest.mark.parametrize("width, height", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_map_is_connected(generate, width, height, seed):
+    layout = generate(width, height, seed)
+    assert len(layout) == height
+    assert all(len(row) == width for row in layout)
+
+    starts = [(x, y) for y, row in enumerate(layout) for x, col in enumerate(row) if col == "P"]
+    assert len(starts) == 1
+
+    free = {(x, y) for y, row in enumerate(layout) for x, col in enumerate(row) if col != "W"}
+    assert reachable(layout, starts[0]) == free
+
+
+@pytest.mark.parametrize("generate", GENERATORS)
+def test_same_seed_same_map(generate):
+    assert generate(60, 40, 3) == generate(60, 40, 3)
+    assert generate(60, 40, 3) != generate(60, 40, 4)
+
+
+def test_split_rooms():
+    layout = cave_map(50, 25, 0)
+    rooms = split_rooms(layout, (20, 10))
+    assert set(rooms) == {(x, y) for x in range(3) for y in range(3)}
+    assert all(len(room) == 10 and all(len(row) == 20 for row in room) for room in rooms.values())
+
+    # Rimettendo insieme le stanze si riottiene la mappa, più i muri di riempimento.
+    joined = ["".join(rooms[(x, y)][row] for x in range(3)) for y in range(3) for row in range(10)]
+    assert [row[:50] for row in joined[:25]] == layout
+    assert set("".join(row[50:] for row in joined) + "".join(joined[25:])) == {"W"}
+
+    x, y = start_room(rooms)
+    assert any("P" in row for row in rooms[(x, y)])
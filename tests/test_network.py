@@ -0,0 +1,164 @@
+import time
+
+import pygame as pg
+import pytest
+
+from entities import Player
+from network import KINDS, LENGTH, MOVING, Client, Disconnected, RemoteView, Server
+
+
+@pytest.fixture
+def server():
+    pg.init()
+    # Serve una modalità video per convertire le immagini caricate.
+    pg.display.set_mode((1, 1))
+    server = Server(("127.0.0.1", 0))
+    yield server
+    server.close()
+
+
+def sync(server: Server, clients: list[Client], ticks: int = 1):
+    """
+    Esegue `ticks` tick del server, attendendo ogni volta che
+    tutti i client ricevano lo snapshot.
+    """
+    for _ in range(ticks):
+        server.tick()
+        for client in clients:
+            deadline = time.monotonic() + 1
+            while not client.poll():
+                assert time.monotonic() < deadline, "no snapshot received"
+
+
+def players(client: Client) -> list:
+    return [e for e in client.state.entities.values() if KINDS[e.kind] is Player]
+
+
+def test_stop_is_replicated(server):
+    for enemy in server.world.enemies.sprites():
+        enemy.kill()
+
+    client = Client(server.address)
+    sync(server, [client])
+
+    client.send_input(1, 0)
+    sync(server, [client], 3)
+    (player,) = players(client)
+    assert player.flags & MOVING
+
+    client.send_input(0, 0)
+    sync(server, [client])
+    assert not player.flags & MOVING
+
+    # Anche dopo un keyframe il giocatore resta fermo.
+    sync(server, [client], server.keyframe_interval)
+    (player,) = players(client)
+    assert not player.flags & MOVING
+    client.close()
+
+
+@pytest.mark.parametrize("payload", [
+    b"\x03\x00\x00\x00ab",      # Troppo lungo per un input.
+    b"\x03\x00",                # Troppo corto.
+])
+def test_malformed_input_disconnects_client(server, payload):
+    bad = Client(server.address)
+    sync(server, [bad])
+    good = Client(server.address)
+    sync(server, [good])
+
+    bad.sock.sendall(LENGTH.pack(len(payload)) + payload)
+    sync(server, [good], 2)
+    assert len(server._connections) == 1
+    bad.close()
+    good.close()
+
+
+def test_oversized_length_disconnects_client(server):
+    client = Client(server.address)
+    sync(server, [client])
+
+    client.sock.sendall(LENGTH.pack(1 << 30))
+    server.tick()
+    time.sleep(.05)
+    server.tick()
+    assert not server._connections
+    client.close()
+
+
+def test_each_client_controls_its_own_player(server):
+    for enemy in server.world.enemies.sprites():
+        enemy.kill()
+
+    first = Client(server.address)
+    second = Client(server.address)
+    sync(server, [first, second])
+    assert len(server.world.player_group) == 2
+    assert len(players(first)) == 2
+
+    start = {id(p): p.pos for p in server.world.player_group}
+    first.send_input(1, 0)
+    second.send_input(0, 1)
+    sync(server, [first, second], 3)
+
+    moved = {}
+    for conn in server._connections:
+        x0, y0 = start[id(conn.player)]
+        x, y = conn.player.pos
+        moved[conn] = (x > x0, y > y0)
+    assert sorted(moved.values()) == [(False, True), (True, False)]
+
+    second.close()
+    sync(server, [first], 2)
+    assert len(server.world.player_group) == 1
+    assert len(players(first)) == 1
+    first.close()
+
+
+class ViewGame:
+    """
+    Sostituisce `Game` per il `RemoteView`.
+    """
+
+    def __init__(self):
+        self.active_state = None
+        self.paused = False
+
+    def pause(self):
+        self.paused = True
+
+
+def test_pause_stops_remote_player(server):
+    for enemy in server.world.enemies.sprites():
+        enemy.kill()
+
+    client = Client(server.address)
+    sync(server, [client])
+    game = ViewGame()
+    view = RemoteView(game, client)
+
+    client.send_input(1, 0)
+    sync(server, [client], 2)
+    (conn,) = server._connections
+    assert conn.player.input_dir == (1, 0)
+
+    view.process_event(pg.event.Event(pg.KEYDOWN, key=pg.K_ESCAPE), 16)
+    assert game.paused
+    sync(server, [client], 2)
+    assert conn.player.input_dir == (0, 0)
+    (player,) = players(client)
+    assert not player.flags & MOVING
+    client.close()
+
+
+def test_client_survives_server_shutdown(server):
+    client = Client(server.address)
+    sync(server, [client])
+    game = ViewGame()
+    game.active_state = view = RemoteView(game, client)
+    view.update(16)
+
+    server.close()
+    for _ in range(3):
+        game.active_state.update(16)
+    assert isinstance(game.active_state, Disconnected)
@@ -0,0 +1,77 @@
+from network import RemotePlayer, ServerGame, ServerWorld, StateEncoder
+from sight import tile_at
+from states import World
+
+# Il giocatore parte accanto all'uscita sul bordo destro, alla riga 5.
+START = ["WWWWWWWWWWWWWWWW",
+         "W              W",
+         "W              W",
+         "W              W",
+         "W              W",
+         "W            P  ",
+         "W              W",
+         "W              W",
+         "W              W",
+         "W              W",
+         "WWWWWWWWWWWWWWWW"]
+
+OPEN = ["WWWWWWWWWWWWWWWW"] + ["W              W"] * 4 + ["               W"] + ["W              W"] * 4 + ["WWWWWWWWWWWWWWWW"]
+WALLED = ["W" * 16] * 11
+# Bordo sinistro aperto dalla riga 1 alla 9.
+WIDE = ["W" * 16] + ["               W"] * 9 + ["W" * 16]
+
+
+class InputWorld(World):
+    player_type = RemotePlayer
+
+
+def walk_right(world: World, frames: int = 60) -> list:
+    """
+    Tiene premuto destra per `frames` frame e restituisce le stanze attraversate.
+    """
+    world.player.input_dir = (1, 0)
+    rooms = []
+    for _ in range(frames):
+        world.update(16)
+        rooms.append(world.room.coords)
+    return rooms
+
+
+def test_room_change_through_open_seam(game):
+    world = InputWorld(game, overworld={(0, 0): START, (1, 0): OPEN}, start_room=(0, 0))
+    rooms = walk_right(world, 20)
+    assert rooms[-1] == (1, 0)
+    # Una sola transizione: il giocatore entra dal bordo sinistro e ci resta.
+    assert sum(a != b for a, b in zip(rooms, rooms[1:])) == 1
+    assert world.player.hitbox.left < 32
+
+
+def test_walled_seam_blocks_room_change(game):
+    world = InputWorld(game, overworld={(0, 0): START, (1, 0): WALLED}, start_room=(0, 0))
+    rooms = walk_right(world)
+    assert set(rooms) == {(0, 0)}
+
+
+class CoopWorld(ServerWorld):
+    overworld = {(0, 0): START, (1, 0): WIDE}
+
+
+def test_other_players_follow_onto_free_tiles(game):
+    world = CoopWorld(ServerGame(30), StateEncoder())
+    leader = world.add_player()
+    follower = world.add_player()
+    # Il secondo giocatore è lontano dal bordo, in alto a sinistra.
+    follower.place_at((40, 40))
+
+    leader.input_dir = (1, 0)
+    for _ in range(20):
+        world.update(16)
+        if world.room.coords != (0, 0):
+            break
+    assert world.room.coords == (1, 0)
+
+    tiles = {tile_at(player.hitbox.center) for player in (leader, follower)}
+    assert len(tiles) == 2
+    for col, row in tiles:
+        assert WIDE[row][col] != "W"
+        assert col == 0
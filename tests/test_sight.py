@@ -0,0 +1,58 @@
+from sight import LineOfSight, tile_at
+from settings import TILESIZE
+
+LAYOUT = [
+    "......",
+    "..W...",
+    "..W...",
+    "......",
+]
+
+
+def make_sight(**kwargs) -> LineOfSight:
+    return LineOfSight([[col == "W" for col in row] for row in LAYOUT], **kwargs)
+
+
+def test_tile_at():
+    assert tile_at((0, 0)) == (0, 0)
+    assert tile_at((TILESIZE * 2.5, TILESIZE - 1)) == (2, 0)
+
+
+def test_wall_blocks_line():
+    sight = make_sight()
+    assert not sight.visible((0, 1), (5, 1))
+    assert not sight.visible((5, 2), (0, 2))
+
+
+def test_clear_lines():
+    sight = make_sight()
+    assert sight.visible((0, 0), (5, 0))
+    assert sight.visible((0, 3), (5, 3))
+    assert sight.visible((3, 0), (3, 3))
+    assert sight.visible((4, 1), (4, 1))
+    # I tile dei muri non bloccano la vista verso se stessi.
+    assert sight.visible((0, 1), (2, 1))
+
+
+def test_outside_grid_is_clear():
+    sight = make_sight()
+    assert sight.visible((-1, 1), (-1, 5))
+
+
+def test_batch_matches_visible():
+    sight = make_sight()
+    sources = [(0, 1), (1, 1), (5, 3), (3, 0), (5, 1)]
+    expected = [False, False, True, True, True]
+    assert [make_sight().visible(source, (5, 1)) for source in sources] == expected
+    assert sight.batch(sources, (5, 1)) == expected
+    # Una seconda volta le risposte vengono dalla cache.
+    assert sight.batch(sources, (5, 1)) == expected
+
+
+def test_cache_is_bounded():
+    sight = make_sight(cache_size=8)
+    for col in range(6):
+        for row in range(4):
+            sight.visible((col, row), (5, 3))
+            assert len(sight) <= 8
+    assert not sight.visible((0, 1), (5, 1))